@@ -1,5 +1,10 @@
+import os
+import sys
 import cv2
 import numpy as np
+from detector import ShapeDetector
+from stage_cache import cache_from_env
+from symmetry import symmetry_scores, find_symmetry_axes
 
 # Only PNG Format Files are Supported
 
@@ -7,61 +12,56 @@ def compute_centroid(points):
     points = np.array(points)
     return np.mean(points, axis=0)
 
-def check_vertical_symmetry(points, line_x):
-    reflected_points = [(2 * line_x - x, y) for (x, y) in points]
-    reflected_points = sorted([tuple(np.round(p).astype(int)) for p in reflected_points])
-    points = sorted([tuple(np.round(p).astype(int)) for p in points])
-    return reflected_points == points
-
-def check_horizontal_symmetry(points, line_y):
-    reflected_points = [(x, 2 * line_y - y) for (x, y) in points]
-    reflected_points = sorted([tuple(np.round(p).astype(int)) for p in reflected_points])
-    points = sorted([tuple(np.round(p).astype(int)) for p in points])
-    return reflected_points == points
-
-def check_diagonal_symmetry(points, line_x, line_y):
-    reflected_points_45 = [(line_x - (y - line_y), line_y + (x - line_x)) for (x, y) in points]
-    reflected_points_135 = [(line_x + (y - line_y), line_y - (x - line_x)) for (x, y) in points]
-    reflected_points_45 = sorted([tuple(np.round(p).astype(int)) for p in reflected_points_45])
-    reflected_points_135 = sorted([tuple(np.round(p).astype(int)) for p in reflected_points_135])
-    points = sorted([tuple(np.round(p).astype(int)) for p in points])
-    return reflected_points_45 == points, reflected_points_135 == points
-
-image = cv2.imread('AdobeR2Final\circle.png', cv2.IMREAD_GRAYSCALE)
-
-if image is None:
-    print("Error loading image")
-    exit()
-
-edges = cv2.Canny(image, 50, 150)
-
-circles = cv2.HoughCircles(edges, cv2.HOUGH_GRADIENT, dp=1.2, minDist=30, param1=50, param2=30, minRadius=10, maxRadius=100)
-
-contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-output_image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
-
-for contour in contours:
-    points = contour[:, 0, :]
-    centroid = compute_centroid(points)
-    centroid_x, centroid_y = centroid
-
-    if check_vertical_symmetry(points, centroid_x):
-        cv2.line(output_image, (int(centroid_x), 0), (int(centroid_x), image.shape[0]), (0, 0, 255), 2)
-
-    if check_horizontal_symmetry(points, centroid_y):
-        cv2.line(output_image, (0, int(centroid_y)), (image.shape[1], int(centroid_y)), (0, 0, 255), 2)
-    
-    diag1, diag2 = check_diagonal_symmetry(points, centroid_x, centroid_y)
-    if diag1:
-        cv2.line(output_image, (0, image.shape[1]), (image.shape[1], 0), (0, 0, 255), 2)
-    if diag2:
-        cv2.line(output_image, (0, 0), (image.shape[1], image.shape[1]), (0, 0, 255), 2)
-
-    cv2.drawContours(output_image, [contour], -1, (0, 255, 0), 2)
-
-if circles is not None:
-    circles = np.round(circles[0, :]).astype("int")
+def check_vertical_symmetry(points, line_x, tol=2.0, min_score=0.9):
+    points = np.asarray(points, dtype=float)
+    centre = (line_x, points[:, 1].mean())
+    return symmetry_scores(points, centre, [np.pi / 2], tol)[0] >= min_score
+
+def check_horizontal_symmetry(points, line_y, tol=2.0, min_score=0.9):
+    points = np.asarray(points, dtype=float)
+    centre = (points[:, 0].mean(), line_y)
+    return symmetry_scores(points, centre, [0.0], tol)[0] >= min_score
+
+def check_diagonal_symmetry(points, line_x, line_y, tol=2.0, min_score=0.9):
+    scores = symmetry_scores(points, (line_x, line_y), [np.pi / 4, 3 * np.pi / 4], tol)
+    return scores[0] >= min_score, scores[1] >= min_score
+
+# Task2 runs Canny on the raw image, and wants dense contour points so mirrored
+# points have something to land on
+SYMMETRY_PARAMS = {
+    'blur_ksize': None,
+    'hough_circles': {'dp': 1.2, 'minDist': 30, 'param1': 50, 'param2': 30, 'minRadius': 10, 'maxRadius': 100},
+    'contour_approx': cv2.CHAIN_APPROX_NONE,
+}
+
+# Function to find the circles, contours and symmetry axes [(angle, score), ...] of every contour.
+# Pass the same detector for every frame to reuse its buffers.
+def detect_symmetry(image, detector=None):
+    detector = detector or ShapeDetector(image.shape, SYMMETRY_PARAMS)
+    found = detector.detect(image, ('circles', 'contours'))
+    found['axes'] = []
+    for contour in found['contours']:
+        points = contour[:, 0, :]
+        # Search every axis angle through the centroid, not just 0/45/90/135 degrees
+        found['axes'].append(find_symmetry_axes(points, compute_centroid(points)))
+    return found
+
+# Function to draw contours, their symmetry axes and the circles' radial axes
+def draw_symmetry(image, found):
+    output_image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    reach = int(np.hypot(*image.shape))
+
+    for contour, axes in zip(found['contours'], found['axes']):
+        centroid_x, centroid_y = compute_centroid(contour[:, 0, :])
+        for angle, score in axes:
+            dx, dy = reach * np.cos(angle), reach * np.sin(angle)
+            p1 = (int(centroid_x - dx), int(centroid_y - dy))
+            p2 = (int(centroid_x + dx), int(centroid_y + dy))
+            cv2.line(output_image, p1, p2, (0, 0, 255), 2)
+
+        cv2.drawContours(output_image, [contour], -1, (0, 255, 0), 2)
+
+    circles = np.round(found['circles']).astype("int")
     for (x, y, r) in circles:
         cv2.circle(output_image, (x, y), r, (0, 255, 0), 2)
         cv2.circle(output_image, (x, y), 2, (0, 0, 255), 3)
@@ -72,6 +72,22 @@ if circles is not None:
             y_end = int(y + r * np.sin(angle))
             cv2.line(output_image, (x, y), (x_end, y_end), (0, 0, 255), 2)
 
-cv2.imshow('Symmetry Detection', output_image)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+    return output_image
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or ['AdobeR2Final\\circle.png']
+    detector = ShapeDetector(params=SYMMETRY_PARAMS, cache=cache_from_env())
+
+    for path in paths:
+        image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+
+        if image is None:
+            print("Error loading image")
+            continue
+
+        output_image = draw_symmetry(image, detect_symmetry(image, detector))
+
+        # Write the result next to the input instead of opening a window
+        out_path = os.path.splitext(path)[0] + '_symmetry.png'
+        cv2.imwrite(out_path, output_image)
+        print(f"Wrote {out_path}")
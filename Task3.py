@@ -1,6 +1,7 @@
+import argparse
+import os
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 from scipy.interpolate import splrep, splev
 
 def read_csv(file_path):
@@ -15,17 +16,19 @@ def read_csv(file_path):
     
     return x, y
 
-def fit_and_complete_curve(x, y):
+def fit_and_complete_curve(x, y, samples=100):
     tck_x = splrep(np.arange(len(x)), x, s=0)
     tck_y = splrep(np.arange(len(y)), y, s=0)
     
-    t_new = np.linspace(0, len(x) - 1, 100)
+    t_new = np.linspace(0, len(x) - 1, samples)
     x_new = splev(t_new, tck_x)
     y_new = splev(t_new, tck_y)
     
     return x_new, y_new
 
-def plot_and_save_curve(x_visible, y_visible, x_completed, y_completed, output_file):
+def plot_and_save_curve(x_visible, y_visible, x_completed, y_completed, output_file, show=True):
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=(10, 6))
     plt.plot(x_visible, y_visible, 'o', label='Visible Points', color='red')
     plt.plot(x_completed, y_completed, '-', label='Completed Curve', color='blue')
@@ -35,25 +38,167 @@ def plot_and_save_curve(x_visible, y_visible, x_completed, y_completed, output_f
     plt.legend()
     plt.grid(True)
     plt.savefig(output_file)
-    plt.show()
+    if show:
+        plt.show()
+    plt.close()
 
-def process_csv(file_path, output_file):
+def process_csv(file_path, output_file, samples=100):
     x, y = read_csv(file_path)
-    x_completed, y_completed = fit_and_complete_curve(x, y)
+    x_completed, y_completed = fit_and_complete_curve(x, y, samples)
     plot_and_save_curve(x, y, x_completed, y_completed, output_file)
 
+# Streaming mode: the curve is parametrised by row index, as above, but fitted in
+# windows of `window` rows. Each window also sees `overlap` rows on either side,
+# and neighbouring windows are blended linearly across an `overlap`-wide band
+# centred on their seam, so only one window of points is in memory at a time.
+
+# Function to read (x, y) blocks from a large CSV without loading it whole
+def iter_points(file_path, chunksize=1_000_000):
+    for df in pd.read_csv(file_path, header=None, chunksize=chunksize, dtype=np.float64, engine='c'):
+        if df.shape[1] < 2:
+            raise ValueError("CSV file must contain at least two columns of data.")
+        yield df.iloc[:, 0].to_numpy(), df.iloc[:, 1].to_numpy()
+
+# Function to fit one window: smoothing is per point (scipy's s = m * variance)
+def fit_window(t, x, y, smoothing=0.0, k=3):
+    s = smoothing * len(t)
+    return splrep(t, x, s=s, k=k), splrep(t, y, s=s, k=k)
+
+def eval_window(tck, t):
+    return np.column_stack((splev(t, tck[0]), splev(t, tck[1])))
+
+# Function to yield the completed curve as (m, 2) blocks, one output sample every
+# `step` rows (step < 1 upsamples)
+def stream_spline(blocks, window=100_000, overlap=1_000, step=1.0, smoothing=0.0, k=3):
+    if overlap < 2 * (k + 1) or window <= overlap:
+        raise ValueError("overlap must be at least 2 * (k + 1) and smaller than window.")
+    half = overlap / 2
+    buf_x, buf_y = np.empty(0), np.empty(0)
+    base = 0  # row index of buf_x[0]
+    prev = None  # fit of the previous window
+    g = 0  # next output sample index
+    j = 0  # current window
+
+    def emit(tck, hi, last=False):
+        nonlocal g
+        # Samples in [emitted, hi): the first overlap band blends with the previous window
+        stop = int(np.floor(hi / step)) + 1 if last else int(np.ceil(hi / step))
+        t = np.arange(g, stop) * step
+        g = stop
+        if len(t) == 0:
+            return None
+        out = eval_window(tck, t)
+        if prev is not None:
+            seam = j * window
+            w = np.clip((t - (seam - half)) / overlap, 0, 1)
+            blend = w < 1
+            if blend.any():
+                out[blend] = (1 - w[blend, None]) * eval_window(prev, t[blend]) + w[blend, None] * out[blend]
+        return out
+
+    for x, y in blocks:
+        buf_x, buf_y = np.concatenate((buf_x, x)), np.concatenate((buf_y, y))
+        # Window j covers rows [j*window - overlap, (j+1)*window + overlap)
+        while base + len(buf_x) >= (j + 1) * window + overlap:
+            lo = max(j * window - overlap, 0)
+            hi = (j + 1) * window + overlap
+            sl = slice(lo - base, hi - base)
+            tck = fit_window(np.arange(lo, hi, dtype=float), buf_x[sl], buf_y[sl], smoothing, k)
+            out = emit(tck, (j + 1) * window - half)
+            if out is not None:
+                yield out
+            prev = tck
+            j += 1
+            # Keep only the rows the next window needs
+            keep = j * window - overlap - base
+            buf_x, buf_y, base = buf_x[keep:], buf_y[keep:], base + keep
+
+    n = base + len(buf_x)
+    if n <= k:
+        raise ValueError(f"At least {k + 1} points are needed to fit a spline.")
+    lo = max(j * window - overlap, 0)
+    sl = slice(lo - base, n - base)
+    tck = fit_window(np.arange(lo, n, dtype=float), buf_x[sl], buf_y[sl], smoothing, k)
+    out = emit(tck, n - 1, last=True)
+    if out is not None:
+        yield out
+
+# Function to write (m, 2) blocks to .csv, .npy or .parquet, chosen by extension.
+# CSV and Parquet are written block by block; .npy needs the total length, so its
+# blocks are gathered first. Returns the number of samples written.
+def write_curve(blocks, output_file):
+    ext = os.path.splitext(output_file)[1].lower()
+    n = 0
+    if ext == '.csv':
+        with open(output_file, 'w') as f:
+            for block in blocks:
+                np.savetxt(f, block, delimiter=',', fmt='%.6f')
+                n += len(block)
+    elif ext == '.npy':
+        parts = list(blocks)
+        data = np.concatenate(parts) if parts else np.empty((0, 2))
+        np.save(output_file, data)
+        n = len(data)
+    elif ext == '.parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([('x', pa.float64()), ('y', pa.float64())])
+        with pq.ParquetWriter(output_file, schema) as writer:
+            for block in blocks:
+                writer.write_table(pa.table({'x': block[:, 0], 'y': block[:, 1]}, schema=schema))
+                n += len(block)
+    else:
+        raise ValueError(f"Unsupported output type '{ext}', expected .csv, .npy or .parquet.")
+    return n
+
+# Function to run the streaming mode from CSV to CSV/NPY/Parquet, without matplotlib
+def process_csv_streaming(file_path, output_file, step=1.0, window=100_000, overlap=1_000,
+                          smoothing=0.0, chunksize=1_000_000):
+    blocks = stream_spline(iter_points(file_path, chunksize), window, overlap, step, smoothing)
+    return write_curve(blocks, output_file)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit a spline through the (x, y) rows of a CSV file.")
+    parser.add_argument('input', help="CSV file with x and y in the first two columns")
+    parser.add_argument('output', help="output file: .csv, .npy or .parquet (streaming), or an image (plot)")
+    parser.add_argument('--step', type=float, default=1.0, help="rows per output sample (default 1)")
+    parser.add_argument('--samples', type=int, default=None, help="plot mode: number of output samples (default 100)")
+    parser.add_argument('--window', type=int, default=100_000, help="rows per spline window")
+    parser.add_argument('--overlap', type=int, default=1_000, help="rows shared by neighbouring windows")
+    parser.add_argument('--smoothing', type=float, default=0.0, help="expected squared error per point (0 interpolates)")
+    parser.add_argument('--chunksize', type=int, default=1_000_000, help="rows read per block")
+    args = parser.parse_args(argv)
+
+    if os.path.splitext(args.output)[1].lower() in ('.csv', '.npy', '.parquet'):
+        n = process_csv_streaming(args.input, args.output, args.step, args.window, args.overlap,
+                                  args.smoothing, args.chunksize)
+        print(f"Wrote {n} samples to {args.output}")
+    else:
+        x, y = read_csv(args.input)
+        x_completed, y_completed = fit_and_complete_curve(x, y, args.samples or 100)
+        plot_and_save_curve(x, y, x_completed, y_completed, args.output, show=False)
+
 if __name__ == "__main__":
-    file_type = input("Enter the file type (csv/svg): ").strip().lower()
-    input_file = input("Enter the path to the input file: ").strip()
-    output_file = input("Enter the path to the output file: ").strip()
+    import sys
 
-    if file_type == 'csv':
-        process_csv(input_file, output_file)
+    if len(sys.argv) > 1:
+        main()
     else:
-        print("Unsupported file type. Please choose 'csv'.")
+        file_type = input("Enter the file type (csv/svg): ").strip().lower()
+        input_file = input("Enter the path to the input file: ").strip()
+        output_file = input("Enter the path to the output file: ").strip()
+
+        if file_type == 'csv':
+            process_csv(input_file, output_file)
+        else:
+            print("Unsupported file type. Please choose 'csv'.")
 
 # How to use this:
 # 1. Ensure you have a CSV file with at least two columns of numeric data (x and y coordinates).
 # 2. Create an 'output' folder in your working directory if it doesn't already exist.
 # 3. Create an empty .png file in the 'output' folder where the completed curve will be saved.
 # 4. Run the script and provide the path to your input CSV file and the path to the output .png file when prompted.
+# 5. For large files, pass the paths as arguments instead, e.g.
+#    python Task3.py trace.csv curve.parquet --step 10 --window 200000
+#    writes every 10th row's position on the fitted curve without loading the file at once.
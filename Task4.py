@@ -1,71 +1,105 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import svgwrite
-from svglib.svglib import svg2rlg
-from reportlab.graphics import renderPM
-from flask import Flask, request, send_file, render_template_string
+from flask import Flask, Response, g, request, send_file, render_template_string, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge
 import os
 import io
+import functools
+import json
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+import zipfile
+from concurrent.futures import TimeoutError as FuturesTimeout, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from polylines import PolylineSet, NotContiguous, load_polylines, iter_polylines
+from svg_writer import svg_bytes
+from raster import render_png, svg_to_png
+from result_cache import ResultCache, stream_key
+from render_pool import RenderPool, PoolBusy
+from metrics import Registry, stage_timer, observe_stages, run_profiled
+from zip_stream import ZipSink, unique_name, write_entry
 
 app = Flask(__name__)
 
+# Request bodies over MAX_UPLOAD_BYTES are refused with 413 while they stream in. File
+# parts are spooled to disk by Werkzeug, then hashed and copied in UPLOAD_CHUNK_BYTES
+# chunks, so a request holds a few chunks in memory whatever the file size.
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_UPLOAD_BYTES', 64 << 20))
+app.config['MAX_FORM_MEMORY_SIZE'] = 1 << 20  # non-file form fields (Flask >= 3.1)
+UPLOAD_CHUNK = int(os.environ.get('UPLOAD_CHUNK_BYTES', 1 << 20))
+
+# Rendered outputs keyed by upload content and options; set RESULT_CACHE_DIR to add a disk tier
+result_cache = ResultCache(max_items=int(os.environ.get('RESULT_CACHE_ITEMS', 256)),
+                           max_bytes=int(os.environ.get('RESULT_CACHE_BYTES', 64 << 20)),
+                           disk_dir=os.environ.get('RESULT_CACHE_DIR'),
+                           max_disk_bytes=int(os.environ.get('RESULT_CACHE_DISK_BYTES', 1 << 30)))
+
+# CPU-heavy conversions run here instead of in the request thread; RENDER_WORKERS=0 renders inline
+render_pool = RenderPool(max_workers=int(os.environ['RENDER_WORKERS']) if 'RENDER_WORKERS' in os.environ else None,
+                         max_pending=int(os.environ['RENDER_MAX_PENDING']) if 'RENDER_MAX_PENDING' in os.environ else None,
+                         timeout=float(os.environ.get('RENDER_TIMEOUT', 60)))
+
+# Request counters and stage latency histograms, served in Prometheus text format at /metrics
+metrics = Registry()
+requests_total = metrics.counter('render_requests_total', 'Render requests by file type and outcome.')
+bytes_in_total = metrics.counter('render_bytes_in_total', 'Request bytes received by render endpoints.')
+bytes_out_total = metrics.counter('render_bytes_out_total', 'Rendered bytes returned.')
+points_total = metrics.counter('render_points_total', 'Polyline points parsed by render jobs.')
+request_seconds = metrics.histogram('render_request_seconds', 'End-to-end request latency by endpoint, file type and outcome.')
+stage_seconds = metrics.histogram('render_stage_seconds', 'Time spent per render stage.')
+
+# With PROFILING=1, an "X-Profile: cprofile|tracemalloc" request header profiles that
+# render (bypassing the cache); the report is kept at /profiles/<id> for the last few requests
+profiling_enabled = os.environ.get('PROFILING', '0') == '1'
+profiles = OrderedDict()
+profiles_lock = threading.Lock()
+MAX_PROFILES = 32
+
+# Uploads are read path by path; files whose path rows are interleaved fall back to
+# the sort-based loader, which groups rows in any order
 def read_csv(csv_file):
-    np_path_XYs = np.genfromtxt(io.StringIO(csv_file.decode('utf-8')), delimiter=',')
-    path_XYs = []
-    for i in np.unique(np_path_XYs[:, 0]):
-        npXYs = np_path_XYs[np_path_XYs[:, 0] == i][:, 1:]
-        XYs = []
-        for j in np.unique(npXYs[:, 0]):
-            XY = npXYs[npXYs[:, 0] == j][:, 1:]
-            XYs.append(XY)
-        path_XYs.append(XYs)
-    return path_XYs
+    if isinstance(csv_file, (bytes, bytearray)):
+        return load_polylines(csv_file)
+    try:
+        return PolylineSet.from_paths(list(iter_polylines(csv_file)))
+    except NotContiguous:
+        csv_file.seek(0)
+        return load_polylines(csv_file)
 
+# matplotlib is only imported when plotting (and svglib only when rasterizing an SVG),
+# so the server and its render workers start without them
 def plot(paths_XYs):
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+
     fig, ax = plt.subplots(tight_layout=True, figsize=(8, 8))
     colours = ['b', 'g', 'r', 'c', 'm', 'y', 'k']
-    for i, XYs in enumerate(paths_XYs):
-        c = colours[i % len(colours)]
-        for XY in XYs:
-            ax.plot(XY[:, 0], XY[:, 1], c=c, linewidth=2)
+    paths = PolylineSet.from_paths(paths_XYs)
+    seg_colours = [colours[i % len(colours)] for i in paths.segment_path_index()]
+    ax.add_collection(LineCollection(paths.segments(), colors=seg_colours, linewidths=2))
+    ax.autoscale()
     ax.set_aspect('equal')
     buf = io.BytesIO()
     plt.savefig(buf, format='png')
     buf.seek(0)
     return buf
 
-def polylines2svg(paths_XYs):
-    W, H = 0, 0
-    colours = ['b', 'g', 'r', 'c', 'm', 'y', 'k']
-    for path_XYs in paths_XYs:
-        for XY in path_XYs:
-            W, H = max(W, np.max(XY[:, 0])), max(H, np.max(XY[:, 1]))
+COLOURS = ['blue', 'green', 'red', 'cyan', 'magenta', 'yellow', 'black']
+
+def polylines2svg(paths_XYs, precision=3, relative=False, simplify=0.0):
+    paths_XYs = PolylineSet.from_paths(paths_XYs)
+    W, H = np.maximum(paths_XYs.bbox()[1], 0) if paths_XYs.n_points else (0, 0)
     padding = 0.1
     W, H = int(W + padding * W), int(H + padding * H)
-    dwg = svgwrite.Drawing(profile='tiny', width=W, height=H)
-    group = dwg.g()
-    for i, path_XYs in enumerate(paths_XYs):
-        path_data = []
-        c = colours[i % len(colours)]
-        for XY in path_XYs:
-            path_str = f"M {XY[0, 0]},{XY[0, 1]} "
-            for j in range(1, len(XY)):
-                path_str += f"L {XY[j, 0]},{XY[j, 1]} "
-            if not np.allclose(XY[0], XY[-1]):
-                path_str += "Z"
-            group.add(dwg.path(d=path_str, fill=c, stroke='none', stroke_width=2))
-    dwg.add(group)
-    buf = io.BytesIO()
-    dwg.saveas(buf)
-    buf.seek(0)
-    return buf
+    return svg_bytes(paths_XYs, COLOURS, width=W, height=H, precision=precision,
+                     relative=relative, simplify=simplify)
 
-def svg_to_png(svg_file):
-    drawing = svg2rlg(io.BytesIO(svg_file.read()))
-    buf = io.BytesIO()
-    renderPM.drawToFile(drawing, buf, fmt='PNG')
-    buf.seek(0)
-    return buf
+# Draw the polylines straight to PNG, skipping the SVG text stage
+def polylines2png(paths_XYs):
+    return io.BytesIO(render_png(paths_XYs, COLOURS))
 
 @app.route('/')
 def index():
@@ -78,28 +112,428 @@ def index():
             <label for="file_type">File type:</label>
             <select name="file_type" id="file_type" required>
                 <option value="csv">CSV</option>
+                <option value="csv_png">CSV to PNG</option>
                 <option value="svg">SVG</option>
             </select>
             <br>
             <input type="submit" value="Upload">
         </form>
+        <h1>Batch Upload</h1>
+        <form action="/batch" method="post" enctype="multipart/form-data">
+            <label for="files">CSV, SVG or ZIP files:</label>
+            <input type="file" name="files" id="files" multiple required>
+            <br>
+            <label for="csv_output">CSV output:</label>
+            <select name="csv_output" id="csv_output">
+                <option value="svg">SVG</option>
+                <option value="png">PNG</option>
+            </select>
+            <br>
+            <input type="submit" value="Upload">
+        </form>
     ''')
 
+# Render jobs run in worker processes and read the spooled upload from disk.
+# Each returns (output bytes, {stage: seconds}, points parsed).
+def render_csv_job(csv_path, options):
+    timings = {}
+    with open(csv_path, 'rb') as f:
+        with stage_timer(timings, 'parse'):
+            paths = read_csv(f)
+    with stage_timer(timings, 'svg'):
+        data = polylines2svg(paths, **options).getvalue()
+    return data, timings, paths.n_points
+
+def render_csv_png_job(csv_path, options):
+    timings = {}
+    with open(csv_path, 'rb') as f:
+        with stage_timer(timings, 'parse'):
+            paths = read_csv(f)
+    with stage_timer(timings, 'rasterize'):
+        data = polylines2png(paths).getvalue()
+    return data, timings, paths.n_points
+
+def render_svg_job(svg_path, options):
+    timings = {}
+    with stage_timer(timings, 'rasterize'):
+        data = svg_to_png(svg_path).getvalue()
+    return data, timings, 0
+
+# Run a render job, optionally under a profiler; returns the job's result plus the report
+def run_job(job, path, options, profile=None):
+    if profile is None:
+        return job(path, options) + (None,)
+    result, report = run_profiled(profile, job, path, options)
+    return result + (report,)
+
+RENDERERS = {
+    'csv': (render_csv_job, 'image/svg+xml', 'output.svg'),
+    'csv_png': (render_csv_png_job, 'image/png', 'output.png'),
+    'svg': (render_svg_job, 'image/png', 'output.png'),
+}
+
+def render_options(file_type, form):
+    if file_type == 'csv':
+        return {'precision': form.get('precision', 3, type=int),
+                'relative': form.get('relative', 'false') == 'true',
+                'simplify': form.get('simplify', 0.0, type=float)}
+    return {}
+
+# Copy an upload stream to a temp file in UPLOAD_CHUNK pieces and return its path
+def spool_upload(stream, file_type):
+    fd, upload_path = tempfile.mkstemp(suffix='.' + file_type)
+    with stage_seconds.time(stage='spool', file_type=file_type), os.fdopen(fd, 'wb') as f:
+        shutil.copyfileobj(stream, f, UPLOAD_CHUNK)
+    return upload_path
+
+# Save the upload to a temp file and start rendering it
+def submit_render(file, file_type, options, key, job_id=None, profile=None):
+    upload_path = spool_upload(file.stream, file_type)
+    try:
+        return start_render(upload_path, file_type, options, key, job_id, profile)
+    except Exception:
+        os.remove(upload_path)
+        raise
+
+# Start rendering a spooled upload; the file is removed and the result cached when
+# the job finishes, even if the request has given up on it
+def start_render(upload_path, file_type, options, key, job_id=None, profile=None):
+    def finish(future):
+        os.remove(upload_path)
+        if future.exception() is None:
+            data, timings, points, _ = future.result()
+            observe_stages(stage_seconds, timings, file_type=file_type)
+            points_total.inc(points, file_type=file_type)
+            result_cache.put(key, data)
+
+    job = RENDERERS[file_type][0]
+    if job_id is None:
+        future = render_pool.submit(run_job, job, upload_path, options, profile)
+        future.add_done_callback(finish)
+        return future
+    return render_pool.submit_job(run_job, job, upload_path, options, profile, on_done=finish, job_id=job_id)
+
+@app.errorhandler(RequestEntityTooLarge)
+def upload_too_large(e):
+    requests_total.inc(file_type='unknown', outcome='too_large')
+    return f"Upload is larger than the {app.config['MAX_CONTENT_LENGTH']} byte limit.", 413
+
+# A job that raised could not read or render the upload itself (a canvas over the raster
+# limit included), so it is the client's error: 422, as 413 is kept for bodies over
+# MAX_UPLOAD_BYTES. A worker that died is the server's (the pool replaces it on the next submit).
+def render_error(e):
+    if isinstance(e, BrokenProcessPool):
+        return "Rendering worker crashed, please retry.", 500
+    return f"Could not render the upload: {e}", 422
+
+def busy_response():
+    return "Server is busy rendering other uploads, please retry shortly.", 503, {'Retry-After': '5'}
+
+def save_profile(report):
+    profile_id = uuid.uuid4().hex
+    with profiles_lock:
+        profiles[profile_id] = report
+        while len(profiles) > MAX_PROFILES:
+            profiles.popitem(last=False)
+    return profile_id
+
+# Profiler requested by the X-Profile header, when profiling is enabled
+def requested_profile():
+    mode = request.headers.get('X-Profile', '').strip().lower()
+    if not profiling_enabled or mode not in ('cprofile', 'tracemalloc'):
+        return None
+    return mode
+
+# Decorator observing a view's latency in request_seconds, labelled with the outcome the
+# view counted ('error' when it raised). A view that hands its work to a streamed
+# response sets g.request_labels to None and observes the latency when the stream ends.
+def timed_request(endpoint):
+    def wrap(view):
+        @functools.wraps(view)
+        def timed_view(*args, **kwargs):
+            started = time.perf_counter()
+            g.request_labels = {'file_type': 'unknown', 'outcome': 'error'}
+            try:
+                return view(*args, **kwargs)
+            finally:
+                if g.request_labels is not None:
+                    request_seconds.observe(time.perf_counter() - started, endpoint=endpoint, **g.request_labels)
+        return timed_view
+    return wrap
+
+# Function to count a request's outcome; the latency observation takes the same labels
+def count_request(file_type, outcome):
+    g.request_labels = {'file_type': file_type, 'outcome': outcome}
+    requests_total.inc(file_type=file_type, outcome=outcome)
+
 @app.route('/upload', methods=['POST'])
+@timed_request('upload')
 def upload_file():
+    bytes_in_total.inc(request.content_length or 0)
     file = request.files['file']
     file_type = request.form['file_type']
-    
-    if file_type == 'csv':
-        path_XYs = read_csv(file.read())
-        buf_svg = polylines2svg(path_XYs)
-        return send_file(buf_svg, mimetype='image/svg+xml', as_attachment=True, download_name='output.svg')
-    
-    elif file_type == 'svg':
-        buf_png = svg_to_png(file)
-        return send_file(buf_png, mimetype='image/png', as_attachment=True, download_name='output.png')
-    
-    return "Invalid file type. Please upload a CSV or SVG file."
+
+    if file_type not in RENDERERS:
+        count_request('invalid', 'rejected')
+        return "Invalid file type. Please upload a CSV or SVG file."
+
+    _, mimetype, download_name = RENDERERS[file_type]
+    options = render_options(file_type, request.form)
+    profile = requested_profile()
+    with stage_seconds.time(stage='hash', file_type=file_type):
+        key = stream_key(file.stream, file_type, sorted(options.items()), chunk_size=UPLOAD_CHUNK)
+    buf = None if profile else result_cache.get(key)
+    outcome, headers = 'cached', {}
+    if buf is None:
+        outcome = 'rendered'
+        try:
+            future = submit_render(file, file_type, options, key, profile=profile)
+        except PoolBusy:
+            count_request(file_type, 'busy')
+            return busy_response()
+        try:
+            data, _, _, report = future.result(timeout=render_pool.timeout)
+        except FuturesTimeout:
+            count_request(file_type, 'timeout')
+            return "Rendering timed out.", 504
+        except Exception as e:
+            count_request(file_type, 'failed')
+            return render_error(e)
+        buf = io.BytesIO(data)
+        if report is not None:
+            headers['X-Profile-Id'] = save_profile(report)
+
+    with stage_seconds.time(stage='send', file_type=file_type):
+        response = send_file(buf, mimetype=mimetype, as_attachment=True, download_name=download_name)
+        response.headers.update(headers)
+    bytes_out_total.inc(buf.getbuffer().nbytes, file_type=file_type)
+    count_request(file_type, outcome)
+    return response
+
+# Async mode for very large files: POST /jobs, poll GET /jobs/<id>, fetch GET /jobs/<id>/result.
+# Job ids are "<file_type>-<content key>", so identical uploads share one job and cached result.
+@app.route('/jobs', methods=['POST'])
+@timed_request('jobs')
+def submit_job():
+    bytes_in_total.inc(request.content_length or 0)
+    file = request.files['file']
+    file_type = request.form['file_type']
+    if file_type not in RENDERERS:
+        count_request('invalid', 'rejected')
+        return jsonify(error="Invalid file type. Please upload a CSV or SVG file."), 400
+
+    options = render_options(file_type, request.form)
+    job_id = f"{file_type}-{stream_key(file.stream, file_type, sorted(options.items()), chunk_size=UPLOAD_CHUNK)}"
+    if job_state(job_id) in (None, 'failed'):
+        try:
+            submit_render(file, file_type, options, job_id.split('-', 1)[1], job_id=job_id)
+        except PoolBusy:
+            count_request(file_type, 'busy')
+            return busy_response()
+    count_request(file_type, 'queued')
+    return jsonify(job_id=job_id, status=job_state(job_id)), 202, {'Location': f'/jobs/{job_id}'}
+
+def job_state(job_id):
+    if job_id.split('-', 1)[-1] in result_cache:
+        return 'done'
+    return render_pool.job_status(job_id)
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    state = job_state(job_id)
+    if state is None:
+        return jsonify(error="Unknown job."), 404
+    body = {'job_id': job_id, 'status': state}
+    if state == 'failed':
+        body['error'] = str(render_pool.job(job_id).exception())
+    return jsonify(body)
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    file_type, _, key = job_id.partition('-')
+    if file_type not in RENDERERS:
+        return jsonify(error="Unknown job."), 404
+    _, mimetype, download_name = RENDERERS[file_type]
+    buf = result_cache.get(key)
+    if buf is None:
+        future = render_pool.job(job_id)
+        if future is None:
+            return jsonify(error="Unknown job."), 404
+        if not future.done():
+            return jsonify(job_id=job_id, status=job_state(job_id)), 409
+        if future.exception() is not None:
+            return jsonify(job_id=job_id, status='failed', error=str(future.exception())), render_error(future.exception())[1]
+        buf = io.BytesIO(future.result()[0])
+    return send_file(buf, mimetype=mimetype, as_attachment=True, download_name=download_name)
+
+@app.route('/cache/stats')
+def cache_stats():
+    return jsonify(result_cache.snapshot())
+
+@app.route('/render/stats')
+def render_stats():
+    return jsonify(render_pool.stats())
+
+# Batch mode: POST /batch with any number of "files" parts (CSV, SVG, or ZIP archives of
+# them). Inputs render concurrently on the render pool and a ZIP of the outputs streams
+# back as each one finishes, ending with manifest.json (one status record per input).
+BATCH_MAX_FILES = int(os.environ.get('BATCH_MAX_FILES', 1000))
+BATCH_MAX_BYTES = int(os.environ.get('BATCH_MAX_BYTES', 1 << 30))  # expanded ZIP members
+BATCH_OUTPUTS = {'svg': '.png', 'csv': '.svg', 'csv_png': '.png'}
+
+# Function to pick the render type for an input name; csv_output chooses SVG or PNG for CSV files
+def batch_file_type(name, csv_output):
+    ext = os.path.splitext(name)[1].lower()
+    if ext == '.csv':
+        return 'csv_png' if csv_output == 'png' else 'csv'
+    if ext == '.svg':
+        return 'svg'
+    return None
+
+# Function to spool every batch input (expanding ZIP archives) to temp files.
+# Returns [(name, file_type, path or None, error)] in upload order.
+def spool_batch(files, csv_output):
+    inputs, expanded = [], 0
+
+    def add(name, stream):
+        file_type = batch_file_type(name, csv_output)
+        if len(inputs) >= BATCH_MAX_FILES:
+            raise ValueError(f"Batch has more than {BATCH_MAX_FILES} files.")
+        if file_type is None:
+            inputs.append((name, None, None, "Unsupported file type."))
+        else:
+            inputs.append((name, file_type, spool_upload(stream, file_type), None))
+
+    try:
+        for file in files:
+            name = file.filename or 'upload'
+            if not name.lower().endswith('.zip'):
+                add(name, file.stream)
+                continue
+            with zipfile.ZipFile(file.stream) as archive:
+                for member in archive.infolist():
+                    if member.is_dir():
+                        continue
+                    expanded += member.file_size
+                    if expanded > BATCH_MAX_BYTES:
+                        raise ValueError(f"ZIP contents exceed the {BATCH_MAX_BYTES} byte limit.")
+                    with archive.open(member) as stream:
+                        add(member.filename, stream)
+    except (ValueError, zipfile.BadZipFile):
+        remove_spooled(inputs)
+        raise
+    return inputs
+
+def remove_spooled(inputs):
+    for _, _, path, _ in inputs:
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+
+# Generator rendering spooled inputs and yielding the ZIP as outputs complete.
+# Inputs are popped from the list as they are handed to the pool, so whatever is
+# left when the response closes was never submitted and can be removed.
+def stream_batch(inputs, options, started):
+    outcome = 'aborted'  # the client went away or the stream failed
+    sink = ZipSink()
+    archive = zipfile.ZipFile(sink, 'w')
+    manifest, used = [], set()
+    running = {}  # future -> manifest record
+    queue = inputs
+
+    def add_output(record, data):
+        record['output'] = unique_name(os.path.splitext(record['input'])[0] + BATCH_OUTPUTS[record['file_type']], used)
+        record['bytes'] = len(data)
+        write_entry(archive, record['output'], data)
+
+    def collect(done):
+        for future in done:
+            record = running.pop(future)
+            if future.exception() is None:
+                add_output(record, future.result()[0])
+            else:
+                record.update(status='error', error=str(future.exception()))
+
+    try:
+        while queue or running:
+            if queue:
+                name, file_type, path, error = queue[0]
+                record = {'input': name, 'file_type': file_type, 'status': 'ok'}
+                if error is not None:
+                    record.update(status='error', error=error)
+                    manifest.append(record)
+                    queue.pop(0)
+                    continue
+                opts = options.get(file_type, {})
+                with open(path, 'rb') as f:
+                    key = stream_key(f, file_type, sorted(opts.items()), chunk_size=UPLOAD_CHUNK)
+                cached = result_cache.get(key)
+                try:
+                    if cached is not None:
+                        os.remove(path)
+                        record['cached'] = True
+                        add_output(record, cached.getvalue())
+                    else:
+                        running[start_render(path, file_type, opts, key)] = record
+                    manifest.append(record)
+                    queue.pop(0)
+                except PoolBusy:
+                    # Pool is full: wait for one of ours to finish before submitting more
+                    if not running:
+                        time.sleep(0.05)
+                        continue
+                    collect(wait(running, timeout=render_pool.timeout, return_when=FIRST_COMPLETED).done)
+            else:
+                done, _ = wait(running, timeout=render_pool.timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    for record in running.values():
+                        record.update(status='error', error="Rendering timed out.")
+                    running.clear()
+                collect(done)
+            yield sink.drain()
+
+        archive.writestr('manifest.json', json.dumps(manifest, indent=1))
+        archive.close()
+        failed = sum(r['status'] != 'ok' for r in manifest)
+        outcome = 'ok' if not failed else 'partial'
+        requests_total.inc(file_type='batch', outcome=outcome)
+        yield sink.drain()
+    finally:
+        remove_spooled(queue)
+        request_seconds.observe(time.perf_counter() - started, endpoint='batch', file_type='batch', outcome=outcome)
+
+@app.route('/batch', methods=['POST'])
+@timed_request('batch')
+def batch_upload():
+    started = time.perf_counter()
+    bytes_in_total.inc(request.content_length or 0)
+    files = request.files.getlist('files')
+    if not files:
+        g.request_labels = {'file_type': 'batch', 'outcome': 'rejected'}
+        return jsonify(error="No files uploaded (use one or more 'files' parts)."), 400
+    csv_output = request.form.get('csv_output', 'svg')
+    options = {'csv': render_options('csv', request.form)}
+    try:
+        inputs = spool_batch(files, csv_output)
+    except (ValueError, zipfile.BadZipFile) as e:
+        count_request('batch', 'rejected')
+        return jsonify(error=str(e)), 400
+    g.request_labels = None  # observed by stream_batch when the ZIP is done
+    response = Response(stream_batch(inputs, options, started), mimetype='application/zip',
+                        headers={'Content-Disposition': 'attachment; filename=outputs.zip'})
+    response.call_on_close(lambda: remove_spooled(inputs))
+    return response
+
+@app.route('/metrics')
+def metrics_text():
+    return metrics.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+@app.route('/profiles/<profile_id>')
+def profile_report(profile_id):
+    with profiles_lock:
+        report = profiles.get(profile_id)
+    if report is None:
+        return "Unknown profile.", 404
+    return report, 200, {'Content-Type': 'text/plain; charset=utf-8'}
 
 if __name__ == "__main__":
     app.run(debug=True)
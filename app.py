@@ -1,200 +1,155 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.linear_model import LinearRegression
-from scipy.spatial.distance import cdist
-from scipy.interpolate import splprep, splev
-import svgwrite
-import cairosvg
 import os
-import matplotlib.colors as mcolors
+from polylines import PolylineSet
+from polyline_store import load_stored
+from svg_writer import write_svg
+from raster import render_png
+from shape_fit import fit_segments, segment_tests, label_segments, LINE, CIRCLE, RECTANGLE
+
+# matplotlib and the scipy-backed stages (symmetry, reassembly, completion) are imported
+# inside the functions that use them, so reading and regularizing start quickly
 
 # Function to read CSV files
 def read_csv(csv_path):
-    np_path_XYs = np.genfromtxt(csv_path, delimiter=',')
-    path_XYs = []
-
-    for i in np.unique(np_path_XYs[:, 0]):
-        npXYs = np_path_XYs[np_path_XYs[:, 0] == i][:, 1:]
-        XYs = []
-        for j in np.unique(npXYs[:, 0]):
-            XY = npXYs[npXYs[:, 0] == j][:, 1:]
-            XYs.append(XY)
-        path_XYs.append(XYs)
-
-    return path_XYs
+    return load_stored(csv_path)
 
 # Function to plot polylines
 def plot(paths_XYs):
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+
     fig, ax = plt.subplots(tight_layout=True, figsize=(8, 8))
     colours = ['b', 'g', 'r', 'c', 'm', 'y', 'k']
     
-    for i, XYs in enumerate(paths_XYs):
-        c = colours[i % len(colours)]
-        for XY in XYs:
-            ax.plot(XY[:, 0], XY[:, 1], c=c, linewidth=2)
+    paths = PolylineSet.from_paths(paths_XYs)
+    seg_colours = [colours[i % len(colours)] for i in paths.segment_path_index()]
+    ax.add_collection(LineCollection(paths.segments(), colors=seg_colours, linewidths=2))
+    ax.autoscale()
 
     ax.set_aspect('equal')
     plt.show()
 
 # Functions to identify basic geometric shapes
 def is_straight_line(XY):
-    if len(XY) < 2:
-        return False
-    X = XY[:, 0].reshape(-1, 1)
-    y = XY[:, 1]
-    model = LinearRegression().fit(X, y)
-    y_pred = model.predict(X)
-    return np.allclose(y, y_pred, atol=1e-2)
+    return bool(segment_tests(fit_segments([[XY]]))['line'][0])
 
 def is_circle(XY):
-    center = XY.mean(axis=0)
-    distances = cdist(XY, [center])
-    return np.allclose(distances, distances.mean(), atol=1e-2)
+    return bool(segment_tests(fit_segments([[XY]]))['circle'][0])
 
 def is_rectangle(XY):
-    if len(XY) != 4:
-        return False
-    edges = np.diff(XY, axis=0, append=XY[:1])
-    return np.allclose(np.linalg.norm(edges, axis=1), np.linalg.norm(edges, axis=1).mean(), atol=1e-2)
-
-def regularize_shapes(paths_XYs):
+    return bool(segment_tests(fit_segments([[XY]]))['rectangle'][0])
+
+# Classify every segment in one batched pass; pass precomputed fits to re-tune tolerances
+def regularize_shapes(paths_XYs, fits=None, **tolerances):
+    paths = PolylineSet.from_paths(paths_XYs)
+    if fits is None:
+        fits = fit_segments(paths)
+    labels = label_segments(fits, **tolerances)
     regular_shapes = {'lines': [], 'circles': [], 'rectangles': []}
-    
-    for path in paths_XYs:
-        for XY in path:
-            if is_straight_line(XY):
-                regular_shapes['lines'].append(XY)
-            elif is_circle(XY):
-                regular_shapes['circles'].append(XY)
-            elif is_rectangle(XY):
-                regular_shapes['rectangles'].append(XY)
-    
+
+    for key, label in (('lines', LINE), ('circles', CIRCLE), ('rectangles', RECTANGLE)):
+        regular_shapes[key] = [paths.segment(k) for k in np.flatnonzero(labels == label)]
+
     return regular_shapes
 
-# Function to find symmetry line
+# Function to find symmetry line: (centre, angle, confidence) of the best mirror axis
 def find_symmetry_line(XY):
-    center = XY.mean(axis=0)
-    distances = cdist(XY, [center])
-    symmetrical_pairs = []
+    from symmetry import segment_symmetry
 
-    for i, point in enumerate(XY):
-        closest_point_idx = np.argmin(distances[i])
-        symmetrical_pairs.append((point, XY[closest_point_idx]))
-
-    return symmetrical_pairs
+    sym = segment_symmetry([[XY]])
+    return sym['centre'][0], sym['angle'][0], sym['confidence'][0]
 
 # Function to plot symmetry
-def plot_symmetry(paths_XYs):
+def plot_symmetry(paths_XYs, min_confidence=0.8):
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+
     fig, ax = plt.subplots(tight_layout=True, figsize=(8, 8))
     colours = ['b', 'g', 'r', 'c', 'm', 'y', 'k']
 
-    for i, XYs in enumerate(paths_XYs):
-        c = colours[i % len(colours)]
-        for XY in XYs:
-            ax.plot(XY[:, 0], XY[:, 1], c=c, linewidth=2)
-            pairs = find_symmetry_line(XY)
-            for p1, p2 in pairs:
-                ax.plot([p1[0], p2[0]], [p1[1], p2[1]], 'k--', linewidth=1)
-    
+    paths = PolylineSet.from_paths(paths_XYs)
+    seg_colours = [colours[i % len(colours)] for i in paths.segment_path_index()]
+    ax.add_collection(LineCollection(paths.segments(), colors=seg_colours, linewidths=2))
+
+    from symmetry import segment_symmetry
+
+    # One batched symmetry search for every segment, then draw the confident axes
+    sym = segment_symmetry(paths)
+    lo, hi = paths.segment_bboxes()
+    half = 0.5 * np.hypot(*(hi - lo).T)
+    direction = np.column_stack((np.cos(sym['angle']), np.sin(sym['angle'])))
+    keep = sym['confidence'] >= min_confidence
+    axes = np.stack((sym['centre'] - half[:, None] * direction,
+                     sym['centre'] + half[:, None] * direction), axis=1)[keep]
+    ax.add_collection(LineCollection(axes, colors='k', linestyles='--', linewidths=1))
+    ax.autoscale()
+
     ax.set_aspect('equal')
     plt.show()
 
 # Function to complete curve
 def complete_curve(XY):
-    # Check if XY has at least four points (for cubic splines)
-    if len(XY) < 4:
-        print("Not enough points to create a spline, skipping this path.")
-        return XY
-    
-    # Check if XY is a 2D array with two columns
-    if XY.shape[1] != 2:
-        print("Invalid shape for input data, expected a 2D array with two columns.")
-        return XY
-    
-    # Ensure the data is numeric
-    if not np.issubdtype(XY.dtype, np.number):
-        print("Non-numeric data found, skipping this path.")
-        return XY
+    from curve_completion import complete_curves
 
-    # Try creating the spline
-    try:
-        tck, u = splprep([XY[:, 0], XY[:, 1]], s=0, per=True)
-        new_points = splev(np.linspace(0, 1, 1000), tck)
-        return np.column_stack(new_points)
-    except Exception as e:
-        print(f"Error in creating spline: {e}")
-        return XY
+    return complete_curves([[XY]])['paths'].segment(0)
 
+# Join fragments and bridge occlusion gaps, then complete every segment in one batched
+# pass; per-segment status is in complete_curves()
+def complete_incomplete_curves(paths_XYs, join_fragments=True, **options):
+    from curve_completion import complete_curves
+    from segment_index import reassemble
 
-def complete_incomplete_curves(paths_XYs):
-    completed_paths = []
-
-    for path in paths_XYs:
-        completed_path = [complete_curve(XY) for XY in path]
-        completed_paths.append(completed_path)
-
-    return completed_paths
+    if join_fragments:
+        paths_XYs = reassemble(paths_XYs)['paths']
+    return complete_curves(paths_XYs, **options)['paths']
 
 # Function to generate SVG and PNG
-def polylines2svg(paths_XYs, svg_path):
+def polylines2svg(paths_XYs, svg_path, precision=3, relative=False, simplify=0.0, png=True):
+    import matplotlib.colors as mcolors
+
     colours = list(mcolors.CSS4_COLORS.values())  # Use valid CSS4 color values
-    W, H = 0, 0
-    
-    for path_XYs in paths_XYs:
-        for XY in path_XYs:
-            W, H = max(W, np.max(XY[:, 0])), max(H, np.max(XY[:, 1]))
-
-    padding = 0.1
-    W, H = int(W + padding * W), int(H + padding * H)
-
-    dwg = svgwrite.Drawing(svg_path, profile='tiny', shape_rendering='crispEdges')
-    group = dwg.g()
-
-    for i, path in enumerate(paths_XYs):
-        path_data = []
-        c = colours[i % len(colours)]
-        for XY in path:
-            path_data.append(("M", (XY[0, 0], XY[0, 1])))
-            for j in range(1, len(XY)):
-                path_data.append(("L", (XY[j, 0], XY[j, 1])))
-            if not np.allclose(XY[0], XY[-1]):
-                path_data.append(("Z", None))
-        group.add(dwg.path(d=path_data, fill=c, stroke='none', stroke_width=2))
-    
-    dwg.add(group)
-    dwg.save()
+    paths_XYs = PolylineSet.from_paths(paths_XYs)
 
+    with open(svg_path, 'wb') as f:
+        write_svg(paths_XYs, f, colours, precision=precision, relative=relative, simplify=simplify,
+                  join_segments=True, shape_rendering='crispEdges')
+
+    if not png:
+        return
+
+    # Rasterize from the coordinates we already hold instead of parsing the SVG back
     png_path = svg_path.replace('.svg', '.png')
-    fact = max(1, 1024 // min(H, W))
-    cairosvg.svg2png(url=svg_path, write_to=png_path, parent_width=W, parent_height=H, output_width=fact * W, output_height=fact * H, background_color='white')
+    with open(png_path, 'wb') as f:
+        f.write(render_png(paths_XYs, colours, join_segments=True))
 
 # Process and visualize polylines for all CSV files in the 'problems' directory
-problems_dir = "machineavengers\problems" 
+if __name__ == "__main__":
+    problems_dir = "machineavengers\problems" 
 
-csv_files = [f for f in os.listdir(problems_dir) if f.endswith('.csv')]
+    csv_files = [f for f in os.listdir(problems_dir) if f.endswith('.csv')]
 
-for csv_file in csv_files:
-    csv_path = os.path.join(problems_dir, csv_file)
-    paths_XYs = read_csv(csv_path)
-    
-    # Plot original polylines
-    print(f"Plotting polylines from {csv_file}")
-    plot(paths_XYs)
-    
-    # Regularize shapes
-    regular_shapes = regularize_shapes(paths_XYs)
-    print(f"Shapes in {csv_file}: { {shape_type: len(shapes) for shape_type, shapes in regular_shapes.items()} }")
-    
-    # Plot symmetry
-    print(f"Plotting symmetry for {csv_file}")
-    plot_symmetry(paths_XYs)
-    
-    # Complete incomplete curves
-    completed_paths_XYs = complete_incomplete_curves(paths_XYs)
-    print(f"Plotting completed curves for {csv_file}")
-    plot(completed_paths_XYs)
-    
-    # Generate SVG and PNG
-    svg_path = csv_path.replace('.csv', '.svg')
-    polylines2svg(paths_XYs, svg_path)
-    print(f"Generated {svg_path} and corresponding PNG file")
\ No newline at end of file
+    for csv_file in csv_files:
+        csv_path = os.path.join(problems_dir, csv_file)
+        paths_XYs = read_csv(csv_path)
+
+        # Plot original polylines
+        print(f"Plotting polylines from {csv_file}")
+        plot(paths_XYs)
+
+        # Regularize shapes
+        regular_shapes = regularize_shapes(paths_XYs)
+        print(f"Shapes in {csv_file}: { {shape_type: len(shapes) for shape_type, shapes in regular_shapes.items()} }")
+
+        # Plot symmetry
+        print(f"Plotting symmetry for {csv_file}")
+        plot_symmetry(paths_XYs)
+
+        # Complete incomplete curves
+        completed_paths_XYs = complete_incomplete_curves(paths_XYs)
+        print(f"Plotting completed curves for {csv_file}")
+        plot(completed_paths_XYs)
+
+        # Generate SVG and PNG
+        svg_path = csv_path.replace('.csv', '.svg')
+        polylines2svg(paths_XYs, svg_path)
+        print(f"Generated {svg_path} and corresponding PNG file")
@@ -0,0 +1,144 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+# Headless batch pipeline over polyline CSV files:
+# read -> regularize -> symmetry -> reassemble -> complete -> SVG/PNG, one file per worker task.
+# Each finished file adds a JSON line to the manifest with shape counts and
+# per-stage timings; files whose outputs are newer than the input are skipped.
+
+
+# Function to list output paths for one input file
+def output_paths(csv_path, out_dir):
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    svg_path = os.path.join(out_dir, name + '.svg')
+    return svg_path, svg_path[:-4] + '.png'
+
+
+# Function to check whether every output exists and is newer than the input
+def is_up_to_date(csv_path, outputs):
+    src = os.path.getmtime(csv_path)
+    return all(os.path.exists(p) and os.path.getmtime(p) >= src for p in outputs)
+
+
+# Function to run the whole pipeline on one CSV file (runs inside a worker process)
+def process_file(csv_path, out_dir, png=True, symmetry_confidence=0.8):
+    from app import read_csv, regularize_shapes, polylines2svg
+    from symmetry import segment_symmetry
+    from curve_completion import complete_curves, status_counts
+    from segment_index import reassemble
+
+    record = {'input': csv_path, 'status': 'ok', 'timings': {}}
+    timings = record['timings']
+
+    def stage(name, fn, *args, **kwargs):
+        t = time.perf_counter()
+        result = fn(*args, **kwargs)
+        timings[name] = round(time.perf_counter() - t, 6)
+        return result
+
+    try:
+        paths = stage('read', read_csv, csv_path)
+        record.update(paths=paths.n_paths, segments=paths.n_segments, points=paths.n_points)
+
+        shapes = stage('regularize', regularize_shapes, paths)
+        record['shapes'] = {k: len(v) for k, v in shapes.items()}
+
+        sym = stage('symmetry', segment_symmetry, paths)
+        record['symmetric_segments'] = int(np.count_nonzero(sym['confidence'] >= symmetry_confidence))
+
+        joined = stage('reassemble', reassemble, paths)
+        record['joins'] = len(joined['joins'])
+        completion = stage('complete', complete_curves, joined['paths'])
+        completed = completion['paths']
+        record['completion'] = status_counts(completion['status'])
+
+        svg_path, png_path = output_paths(csv_path, out_dir)
+        stage('render', polylines2svg, completed, svg_path, png=png)
+        record['outputs'] = [svg_path, png_path] if png else [svg_path]
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = f"{type(e).__name__}: {e}"
+    record['timings']['total'] = round(sum(timings.values()), 6)
+    return record
+
+
+# Function to read the records of a previous run, keyed by input path
+def read_manifest(manifest_path):
+    records = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    records[record['input']] = record
+    return records
+
+
+# Function to process many CSV files across a process pool and write the manifest
+def run_batch(csv_paths, out_dir, workers=None, resume=True, png=True, manifest_path=None):
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = manifest_path or os.path.join(out_dir, 'manifest.jsonl')
+    previous = read_manifest(manifest_path) if resume else {}
+
+    todo, records = [], []
+    for csv_path in csv_paths:
+        outputs = output_paths(csv_path, out_dir)[:2 if png else 1]
+        if resume and is_up_to_date(csv_path, outputs):
+            record = dict(previous.get(csv_path, {'input': csv_path, 'status': 'ok'}))
+            record['skipped'] = True
+            records.append(record)
+        else:
+            todo.append(csv_path)
+
+    with open(manifest_path, 'w') as manifest:
+        for record in records:
+            manifest.write(json.dumps(record) + '\n')
+
+        if workers == 0:
+            finished = (process_file(p, out_dir, png) for p in todo)
+        else:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            futures = [pool.submit(process_file, p, out_dir, png) for p in todo]
+            finished = (f.result() for f in as_completed(futures))
+        try:
+            for record in finished:
+                records.append(record)
+                manifest.write(json.dumps(record) + '\n')
+                manifest.flush()
+        finally:
+            if workers != 0:
+                pool.shutdown()
+    return records
+
+
+# Function to expand directories into the CSV files they contain
+def collect_inputs(inputs):
+    csv_paths = []
+    for path in inputs:
+        if os.path.isdir(path):
+            csv_paths.extend(sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith('.csv')))
+        else:
+            csv_paths.append(path)
+    return csv_paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the polyline pipeline over many CSV files.")
+    parser.add_argument('inputs', nargs='+', help="CSV files or directories of CSV files")
+    parser.add_argument('-o', '--out-dir', default='Output', help="directory for SVG/PNG results and the manifest")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="worker processes (0 runs in-process)")
+    parser.add_argument('--no-resume', action='store_true', help="reprocess files even if outputs are up to date")
+    parser.add_argument('--no-png', action='store_true', help="only write SVG files")
+    args = parser.parse_args()
+
+    records = run_batch(collect_inputs(args.inputs), args.out_dir, workers=args.workers,
+                        resume=not args.no_resume, png=not args.no_png)
+    failed = [r for r in records if r['status'] != 'ok']
+    print(f"Processed {len(records)} files ({sum(r.get('skipped', False) for r in records)} skipped, {len(failed)} failed)")
+    for r in failed:
+        print(f"  {r['input']}: {r['error']}")
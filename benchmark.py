@@ -0,0 +1,255 @@
+import argparse
+import gc
+import glob
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+# Benchmarks for the polyline pipeline stages (read, open, regularize, symmetry,
+# reassemble, complete, render) over problems/*.csv and for the Task1 detector stages over
+# the bundled PNG inputs, each also on synthetic scaled-up copies. Every stage
+# reports the best wall time over --repeat runs, throughput (points or pixels
+# per second) and two memory peaks from separate runs: the Python heap traced by
+# tracemalloc, and the resident set (RSS) of a fresh process running the stage alone,
+# which also counts the buffers OpenCV and NumPy allocate outside the Python heap.
+# Results are JSON; --baseline compares them against an earlier results file.
+
+CSV_INPUTS = 'problems/*.csv'
+IMAGE_INPUTS = ['Input.png', 'lineInput1.png', 'lineInput2.png', 'lineInput3.png',
+                'rectf.png', 'hexf.png', 'squaref.png']
+
+
+# Function to time fn(*args): best wall time over repeat runs, traced Python heap peak
+# and peak RSS growth (see stage_rss)
+def measure(fn, *args, repeat=3):
+    best = np.inf
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t)
+    tracemalloc.start()
+    try:
+        fn(*args)
+        heap = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, heap, stage_rss(fn, *args)
+
+
+# Function to read a memory figure (VmRSS, VmHWM) of this process in bytes. Without
+# /proc, ru_maxrss stands in for both (kilobytes on Linux, bytes on macOS).
+def read_rss(field):
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+# Function to run one stage in a child process and send back how far its RSS rose
+# above the RSS it had once the inputs were loaded. The high-water mark is reset
+# first where Linux allows it, so unpickling the inputs does not count.
+def rss_child(conn, fn, args):
+    gc.collect()
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+    base = read_rss('VmRSS')
+    fn(*args)
+    conn.send(max(read_rss('VmHWM') - base, 0))
+    conn.close()
+
+
+# Function to measure the peak RSS growth of fn(*args) in a fresh (spawned) process, so
+# memory the allocators kept from earlier stages cannot hide it
+def stage_rss(fn, *args):
+    ctx = multiprocessing.get_context('spawn')
+    recv, send = ctx.Pipe(duplex=False)
+    child = ctx.Process(target=rss_child, args=(send, fn, args))
+    child.start()
+    send.close()
+    try:
+        return recv.recv()
+    except EOFError:
+        child.join()
+        raise RuntimeError(f"stage process failed with exit code {child.exitcode}") from None
+    finally:
+        child.join()
+
+
+# Function to build a scaled copy of a PolylineSet: `factor` copies of every path,
+# laid out on a grid so they do not overlap (paths and points both grow by factor)
+def scale_polylines(paths, factor):
+    from polylines import PolylineSet
+
+    if factor == 1:
+        return paths
+    size = paths.bbox()[1] * 1.1
+    cols = int(np.ceil(np.sqrt(factor)))
+    copies = []
+    for c in range(factor):
+        shift = size * np.array((c % cols, c // cols))
+        copies.extend([[XY + shift for XY in path] for path in paths.to_lists()])
+    return PolylineSet.from_paths(copies)
+
+
+# Function to benchmark the pipeline stages on one polyline dataset
+def bench_polylines(name, paths, repeat, out_dir):
+    from app import regularize_shapes, polylines2svg
+    from symmetry import segment_symmetry
+    from curve_completion import complete_curves
+    from segment_index import reassemble
+    from polylines import load_polylines, dump_polylines
+    from polyline_store import load_stored
+
+    data = dump_polylines(paths)
+    # 'open' is a load through an already built binary store
+    csv_path = os.path.join(out_dir, f"{name.replace(' ', '_')}.csv")
+    with open(csv_path, 'wb') as f:
+        f.write(data)
+    load_stored(csv_path)
+    completed = complete_curves(paths)['paths']
+    svg_path = os.path.join(out_dir, 'bench.svg')
+    stages = [
+        ('read', load_polylines, data),
+        ('open', load_stored, csv_path),
+        ('regularize', regularize_shapes, paths),
+        ('symmetry', segment_symmetry, paths),
+        ('reassemble', reassemble, paths),
+        ('complete', complete_curves, paths),
+        ('render', polylines2svg, completed, svg_path),
+    ]
+    results = []
+    for stage, fn, *args in stages:
+        results.append(record(name, stage, *measure(fn, *args, repeat=repeat), paths.n_points, 'points'))
+    return results
+
+
+# Function to benchmark the detector stages on one grayscale image. Each stage runs
+# on its own, so lines/circles/contours include the shared blur and Canny step.
+def bench_image(name, image, repeat):
+    from detector import ShapeDetector
+    from Task1 import detect_shapes
+
+    detector = ShapeDetector(image.shape)
+    results = []
+    for stage in ('edges', 'lines', 'circles', 'contours', 'shapes'):
+        results.append(record(name, stage, *measure(detector.detect, image, (stage,), repeat=repeat),
+                              image.size, 'pixels'))
+    results.append(record(name, 'detect_shapes', *measure(detect_shapes, image, repeat=repeat),
+                          image.size, 'pixels'))
+    return results
+
+
+def record(case, stage, wall, heap, rss, items, unit):
+    return {'case': case, 'stage': stage, 'wall_s': round(wall, 6), 'items': int(items), 'unit': unit,
+            'items_per_s': round(items / wall, 1) if wall > 0 else None,
+            'heap_peak_bytes': int(heap), 'rss_peak_bytes': int(rss)}
+
+
+# Function to run every benchmark and return the results document
+def run_benchmarks(csv_paths, image_paths, scales=(1, 10, 100), image_scales=(1, 10), repeat=3, log=print):
+    import cv2
+    from polylines import load_polylines
+
+    results = []
+    with tempfile.TemporaryDirectory() as out_dir:
+        for csv_path in csv_paths:
+            base = load_polylines(csv_path)
+            for factor in scales:
+                name = f"{os.path.basename(csv_path)} x{factor}"
+                log(f"  {name}")
+                results.extend(bench_polylines(name, scale_polylines(base, factor), repeat, out_dir))
+
+    for image_path in image_paths:
+        image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            log(f"  skipping {image_path}: cannot be read")
+            continue
+        for factor in image_scales:
+            # Scaled images tile the original, so the pixel count grows by ~factor
+            side = int(np.ceil(np.sqrt(factor)))
+            scaled = np.tile(image, (side, int(np.ceil(factor / side)))) if factor > 1 else image
+            name = f"{os.path.basename(image_path)} x{factor}"
+            log(f"  {name}")
+            results.extend(bench_image(name, np.ascontiguousarray(scaled), repeat))
+
+    return {
+        'meta': {'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': sys.version.split()[0],
+                 'numpy': np.__version__, 'platform': platform.platform(), 'cpus': os.cpu_count(),
+                 'repeat': repeat},
+        'results': results,
+    }
+
+
+# Function to compare results against a baseline document. A stage regresses when its
+# wall time grows by more than `threshold` (fractional) and by at least `min_delta` seconds.
+def compare(results, baseline, threshold=0.2, min_delta=0.002):
+    previous = {(r['case'], r['stage']): r for r in baseline['results']}
+    regressions = []
+    for r in results['results']:
+        old = previous.get((r['case'], r['stage']))
+        if old is None:
+            continue
+        ratio = r['wall_s'] / old['wall_s'] if old['wall_s'] > 0 else np.inf
+        if ratio > 1 + threshold and r['wall_s'] - old['wall_s'] >= min_delta:
+            regressions.append({'case': r['case'], 'stage': r['stage'], 'baseline_s': old['wall_s'],
+                                'wall_s': r['wall_s'], 'ratio': round(ratio, 3)})
+    return regressions
+
+
+def print_table(results):
+    print(f"{'case':<28}{'stage':<15}{'wall ms':>10}{'items/s':>14}{'heap MB':>10}{'RSS MB':>10}")
+    for r in results['results']:
+        rate = f"{r['items_per_s']:.3g}" if r['items_per_s'] else '-'
+        print(f"{r['case']:<28}{r['stage']:<15}{r['wall_s'] * 1e3:>10.2f}{rate:>14}"
+              f"{r['heap_peak_bytes'] / 2**20:>10.2f}{r['rss_peak_bytes'] / 2**20:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the polyline pipeline and the shape detector.")
+    parser.add_argument('--csv', nargs='*', default=None, help=f"CSV inputs (default {CSV_INPUTS})")
+    parser.add_argument('--images', nargs='*', default=None, help="image inputs (default the bundled PNGs)")
+    parser.add_argument('--scales', default='1,10,100', help="polyline scale factors (comma separated)")
+    parser.add_argument('--image-scales', default='1,10', help="image pixel-count scale factors")
+    parser.add_argument('-r', '--repeat', type=int, default=3, help="timed runs per stage (best is kept)")
+    parser.add_argument('-o', '--output', default='benchmark.json', help="where to write the results")
+    parser.add_argument('--baseline', help="earlier results file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed fractional slowdown (default 0.2)")
+    args = parser.parse_args()
+
+    csv_paths = sorted(glob.glob(CSV_INPUTS)) if args.csv is None else args.csv
+    image_paths = IMAGE_INPUTS if args.images is None else args.images
+    results = run_benchmarks(csv_paths, [p for p in image_paths if os.path.exists(p)],
+                             scales=[int(s) for s in args.scales.split(',') if s],
+                             image_scales=[int(s) for s in args.image_scales.split(',') if s],
+                             repeat=args.repeat)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=1)
+    print_table(results)
+    print(f"Wrote {len(results['results'])} results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r['case']} {r['stage']}: {r['baseline_s'] * 1e3:.2f} ms -> "
+                  f"{r['wall_s'] * 1e3:.2f} ms (x{r['ratio']})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
@@ -0,0 +1,212 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+# Headless command line entry point, one subcommand per stage:
+#   detect IMAGE...       line, circle and contour shape counts (Task1)
+#   symmetry INPUT...     mirror axes of image contours (Task2) or of polyline segments
+#   regularize CSV...     line / circle / rectangle counts
+#   complete CSV...       join fragments, complete curves, write <name>_completed.csv
+#   render INPUT...       CSV -> SVG (+ PNG), SVG -> PNG
+# Each subcommand imports its backends once, then works through every input in the
+# same process and prints one JSON record per input. Nothing opens a window.
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+CSV_EXTENSIONS = ('.csv',)
+
+
+# Function to expand directories into the files they contain with the given extensions
+def collect_inputs(inputs, extensions):
+    found = []
+    for path in inputs:
+        if os.path.isdir(path):
+            found.extend(sorted(os.path.join(path, f) for f in os.listdir(path) if f.lower().endswith(extensions)))
+        else:
+            found.append(path)
+    return found
+
+
+# Function to build an output path: out_dir (default: beside the input) / stem + suffix
+def output_path(path, out_dir, suffix):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    out_dir = out_dir or os.path.dirname(path)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    return os.path.join(out_dir, stem + suffix)
+
+
+def read_image(path):
+    import cv2
+
+    image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        raise ValueError("image not found or cannot be loaded")
+    return image
+
+
+# Each command takes the parsed arguments, does its imports and shared setup once,
+# and returns a function that processes one input into a result dict
+
+def detect_command(args):
+    import cv2
+    from detector import ShapeDetector
+    from stage_cache import cache_from_env
+    from Task1 import detect_shapes, draw_shapes, count_shapes
+
+    detector = ShapeDetector(cache=cache_from_env())
+
+    def run(path):
+        image = read_image(path)
+        found = detect_shapes(image, detector)
+        result = {'counts': count_shapes(found)}
+        if args.draw:
+            result['output'] = output_path(path, args.out_dir, '_shapes.png')
+            cv2.imwrite(result['output'], draw_shapes(image, found))
+        return result
+    return run
+
+
+def symmetry_command(args):
+    import numpy as np
+
+    def run_csv(path):
+        from app import read_csv
+        from symmetry import segment_symmetry
+
+        sym = segment_symmetry(read_csv(path))
+        keep = np.flatnonzero(sym['confidence'] >= args.min_confidence)
+        return {'segments': len(sym['confidence']), 'symmetric_segments': len(keep),
+                'axes': [{'segment': int(k), 'centre': [round(float(c), 3) for c in sym['centre'][k]],
+                          'angle': round(float(np.degrees(sym['angle'][k])), 2),
+                          'confidence': round(float(sym['confidence'][k]), 3)} for k in keep]}
+
+    detector = None
+
+    def run_image(path):
+        nonlocal detector
+        import cv2
+        from detector import ShapeDetector
+        from stage_cache import cache_from_env
+        from Task2 import SYMMETRY_PARAMS, detect_symmetry, draw_symmetry
+
+        if detector is None:
+            detector = ShapeDetector(params=SYMMETRY_PARAMS, cache=cache_from_env())
+        image = read_image(path)
+        found = detect_symmetry(image, detector)
+        result = {'contours': len(found['contours']), 'circles': len(found['circles']),
+                  'axes': [[[round(float(np.degrees(a)), 2), round(float(s), 3)] for a, s in axes]
+                           for axes in found['axes']]}
+        if args.draw:
+            result['output'] = output_path(path, args.out_dir, '_symmetry.png')
+            cv2.imwrite(result['output'], draw_symmetry(image, found))
+        return result
+
+    return lambda path: run_csv(path) if path.lower().endswith(CSV_EXTENSIONS) else run_image(path)
+
+
+def regularize_command(args):
+    from app import read_csv, regularize_shapes
+
+    def run(path):
+        paths = read_csv(path)
+        shapes = regularize_shapes(paths)
+        return {'segments': paths.n_segments, 'shapes': {k: len(v) for k, v in shapes.items()}}
+    return run
+
+
+def complete_command(args):
+    from app import read_csv
+    from polylines import dump_polylines
+    from segment_index import reassemble
+    from curve_completion import complete_curves, status_counts
+
+    def run(path):
+        paths = read_csv(path)
+        result = {'segments': paths.n_segments}
+        if not args.no_join:
+            joined = reassemble(paths)
+            paths = joined['paths']
+            result['joins'] = len(joined['joins'])
+        completion = complete_curves(paths, harmonics=args.harmonics)
+        result['completion'] = status_counts(completion['status'])
+        result['output'] = output_path(path, args.out_dir, '_completed.csv')
+        with open(result['output'], 'wb') as f:
+            f.write(dump_polylines(completion['paths']))
+        return result
+    return run
+
+
+def render_command(args):
+    def run_csv(path):
+        from app import read_csv, polylines2svg
+
+        svg_path = output_path(path, args.out_dir, '.svg')
+        polylines2svg(read_csv(path), svg_path, precision=args.precision, simplify=args.simplify,
+                      png=not args.no_png)
+        return {'outputs': [svg_path] if args.no_png else [svg_path, svg_path[:-4] + '.png']}
+
+    def run_svg(path):
+        from raster import svg_to_png
+
+        png_path = output_path(path, args.out_dir, '.png')
+        with open(png_path, 'wb') as f:
+            f.write(svg_to_png(path).getvalue())
+        return {'outputs': [png_path]}
+
+    return lambda path: run_svg(path) if path.lower().endswith('.svg') else run_csv(path)
+
+
+COMMANDS = {
+    'detect': (detect_command, IMAGE_EXTENSIONS, "detect lines, circles and shapes in images"),
+    'symmetry': (symmetry_command, IMAGE_EXTENSIONS + CSV_EXTENSIONS, "find mirror axes in images or polyline CSVs"),
+    'regularize': (regularize_command, CSV_EXTENSIONS, "classify polyline segments as lines, circles, rectangles"),
+    'complete': (complete_command, CSV_EXTENSIONS, "join fragments and complete curves in polyline CSVs"),
+    'render': (render_command, CSV_EXTENSIONS + ('.svg',), "render polyline CSVs to SVG/PNG and SVGs to PNG"),
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Headless shape detection and polyline tools.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    for name, (_, _, help) in COMMANDS.items():
+        p = sub.add_parser(name, help=help, description=help)
+        p.add_argument('inputs', nargs='+', help="input files or directories")
+        p.add_argument('-o', '--out-dir', default=None, help="directory for output files (default: beside each input)")
+        if name in ('detect', 'symmetry'):
+            p.add_argument('--draw', action='store_true', help="write an annotated PNG per image")
+        if name == 'symmetry':
+            p.add_argument('--min-confidence', type=float, default=0.8, help="minimum axis confidence for CSV inputs")
+        if name == 'complete':
+            p.add_argument('--no-join', action='store_true', help="complete segments without joining fragments")
+            p.add_argument('--harmonics', type=int, default=12, help="Fourier harmonics per curve")
+        if name == 'render':
+            p.add_argument('--no-png', action='store_true', help="only write SVG files for CSV inputs")
+            p.add_argument('--precision', type=int, default=3, help="decimal places in SVG coordinates")
+            p.add_argument('--simplify', type=float, default=0.0, help="polyline simplification tolerance")
+    return parser
+
+
+# Function to run the CLI; returns the exit status (1 when any input failed)
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    make_command, extensions, _ = COMMANDS[args.command]
+    run = make_command(args)
+    failed = 0
+    for path in collect_inputs(args.inputs, extensions):
+        record = {'input': path, 'status': 'ok'}
+        t = time.perf_counter()
+        try:
+            record.update(run(path))
+        except Exception as e:
+            record['status'] = 'error'
+            record['error'] = f"{type(e).__name__}: {e}"
+            failed += 1
+        record['seconds'] = round(time.perf_counter() - t, 6)
+        print(json.dumps(record), flush=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+import cv2
+import numpy as np
+from polylines import PolylineSet
+
+# Batched contour classification for the Task1 shape detector. Contours are
+# packed into one PolylineSet (one segment per contour) so perimeters, bounding
+# boxes, vertex angles and radial statistics (and, on request, moments and hulls)
+# are segmented NumPy reductions. Every contour is approximated with approxPolyDP
+# as before; cheap pre-filters (perimeter, point count, size) only gate the
+# ellipse branch, so tiny noise contours never reach fitEllipse.
+
+
+# Function to pack OpenCV contours ((n, 1, 2) int arrays) into a PolylineSet
+def pack_contours(contours):
+    return PolylineSet.from_paths([[np.asarray(c).reshape(-1, 2) for c in contours]])
+
+
+# Function to compute closed-contour features for every contour at once: point counts,
+# perimeter and bounding box, plus (with moments) area, aspect, vertex centroid and area
+# moments (centre and second central moments, as cv2.moments), and (with hull) convex
+# hull area and solidity
+def contour_features(packed, moments=True, hull=True):
+    moments = moments or hull  # solidity needs the area
+    starts = packed.seg_offsets[:-1]
+    counts = np.diff(packed.seg_offsets)
+    n = packed.n_segments
+    if n == 0:
+        empty = np.empty(0)
+        feats = {'counts': counts, 'perimeter': empty, 'bbox': np.empty((0, 4))}
+        if moments:
+            feats.update(area=empty, aspect=empty, centroid=np.empty((0, 2)), mass_centre=np.empty((0, 2)),
+                         mu20=empty, mu11=empty, mu02=empty)
+        if hull:
+            feats.update(hull_area=empty, solidity=empty)
+        return feats
+
+    lo, hi = packed.segment_bboxes()
+    # Successor of every point within its own contour (closing back to the first point)
+    nxt = np.arange(len(packed.coords)) + 1
+    nxt[packed.seg_offsets[1:] - 1] = starts
+    step = packed.coords[nxt] - packed.coords
+    size = hi - lo + 1
+    feats = {
+        'counts': counts,
+        'perimeter': np.add.reduceat(np.hypot(step[:, 0], step[:, 1]), starts),
+        'bbox': np.column_stack((lo, size)),  # x, y, w, h like cv2.boundingRect
+    }
+    if not moments:
+        return feats
+
+    # Coordinates relative to each contour's box corner keep the moment sums well conditioned
+    xy = packed.coords - lo[packed.point_segment_index()]
+    x0, y0, x1, y1 = xy[:, 0], xy[:, 1], xy[nxt, 0], xy[nxt, 1]
+    cross = x0 * y1 - x1 * y0
+
+    # Polygon moments by Green's theorem, made orientation independent by the sign of m00
+    m00 = np.add.reduceat(cross, starts) / 2
+    m10 = np.add.reduceat((x0 + x1) * cross, starts) / 6
+    m01 = np.add.reduceat((y0 + y1) * cross, starts) / 6
+    m20 = np.add.reduceat((x0 * x0 + x0 * x1 + x1 * x1) * cross, starts) / 12
+    m02 = np.add.reduceat((y0 * y0 + y0 * y1 + y1 * y1) * cross, starts) / 12
+    m11 = np.add.reduceat((x0 * y1 + 2 * x0 * y0 + 2 * x1 * y1 + x1 * y0) * cross, starts) / 24
+    sign = np.where(m00 < 0, -1.0, 1.0)
+    m00, m10, m01, m20, m02, m11 = (sign * m for m in (m00, m10, m01, m20, m02, m11))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cx, cy = m10 / m00, m01 / m00
+    degenerate = m00 == 0
+    cx[degenerate], cy[degenerate] = 0.0, 0.0
+
+    feats.update({
+        'area': m00,
+        'aspect': size.max(axis=1) / size.min(axis=1),
+        'centroid': packed.segment_centroids(),
+        'mass_centre': lo + np.column_stack((cx, cy)),
+        'mu20': m20 - cx * m10,
+        'mu11': m11 - cx * m01,
+        'mu02': m02 - cy * m01,
+    })
+    if hull:
+        contours = np.split(packed.coords.astype(np.float32), packed.seg_offsets[1:-1])
+        feats['hull_area'] = np.array([cv2.contourArea(cv2.convexHull(c)) for c in contours])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            feats['solidity'] = np.where(feats['hull_area'] > 0, m00 / feats['hull_area'], 0.0)
+    return feats
+
+
+# Function to test 4-vertex polygons for rounded corners, for (m, 4, 2) vertex arrays
+def rounded_corners(quads):
+    pt1, pt2, pt3 = quads, np.roll(quads, -1, axis=1), np.roll(quads, -2, axis=1)
+    angle = np.arctan2(pt3[..., 1] - pt2[..., 1], pt3[..., 0] - pt2[..., 0]) - \
+        np.arctan2(pt1[..., 1] - pt2[..., 1], pt1[..., 0] - pt2[..., 0])
+    return np.all(np.abs(angle) < np.pi / 2, axis=1)
+
+
+# Function to test polygons (packed, one segment each) for star shapes: at least
+# min_vertices vertices, all within tol of the mean distance from their centre
+def star_like(packed, min_vertices=10, tol=0.2):
+    starts = packed.seg_offsets[:-1]
+    counts = np.diff(packed.seg_offsets)
+    if packed.n_segments == 0:
+        return np.zeros(0, dtype=bool)
+    seg = packed.point_segment_index()
+    dist = np.hypot(*(packed.coords - packed.segment_centroids()[seg]).T)
+    mean = np.add.reduceat(dist, starts) / counts
+    worst = np.maximum.reduceat(np.abs(dist - mean[seg]), starts)
+    return (counts >= min_vertices) & (worst < mean * tol)
+
+
+# Function to classify every contour into the Task1 shape lists in one pass.
+# min_perimeter only pre-filters the ellipse fits; every contour is approximated.
+def classify_contours(contours, min_perimeter=20.0, min_axis=15, max_axis_ratio=2.0, epsilon_frac=0.02):
+    shapes = {'rectangles': [], 'rounded_rectangles': [], 'polygons': [], 'ellipses': [], 'stars': []}
+    if len(contours) == 0:
+        return shapes
+    # Only the perimeter, point counts and boxes are used here, so moments and hulls are skipped
+    feats = contour_features(pack_contours(contours), moments=False, hull=False)
+
+    approxes = [cv2.approxPolyDP(c, epsilon_frac * p, True) for c, p in zip(contours, feats['perimeter'])]
+    n_vertices = np.array([len(a) for a in approxes], dtype=int)
+
+    quads = np.flatnonzero(n_vertices == 4)
+    if len(quads):
+        rounded = rounded_corners(np.stack([approxes[k].reshape(4, 2) for k in quads]).astype(float))
+        for k, r in zip(quads, rounded):
+            shapes['rounded_rectangles' if r else 'rectangles'].append(approxes[k])
+
+    shapes['polygons'] = [approxes[k] for k in np.flatnonzero(n_vertices >= 5)]
+
+    many = np.flatnonzero(n_vertices >= 10)
+    if len(many):
+        stars = star_like(pack_contours([approxes[k] for k in many]))
+        shapes['stars'] = [approxes[k] for k in many[stars]]
+
+    # fitEllipse needs 5 points; short contours and ones smaller than min_axis in both
+    # directions are treated as noise rather than fitted
+    w, h = feats['bbox'][:, 2], feats['bbox'][:, 3]
+    ellipse_ok = (feats['perimeter'] >= min_perimeter) & (feats['counts'] >= 5) & (np.maximum(w, h) > min_axis)
+    for i in np.flatnonzero(ellipse_ok):
+        try:
+            ellipse = cv2.fitEllipse(contours[i])
+        except cv2.error:
+            continue
+        axes = ellipse[1]
+        if axes[0] > min_axis and axes[1] > min_axis and 1 / max_axis_ratio < axes[0] / axes[1] < max_axis_ratio:
+            shapes['ellipses'].append(ellipse)
+    return shapes
@@ -0,0 +1,168 @@
+import numpy as np
+from polylines import PolylineSet
+
+# Batched closed-curve completion. Every segment is parametrised by normalised
+# arc length around the closed loop (including the gap from its last point back
+# to its first) and fitted with a truncated Fourier series by periodic least
+# squares. The normal equations of all segments in a chunk are built with
+# segmented reductions and solved in one batched call. Segments the series does
+# not follow closely (sharp corners) fall back to a periodic spline, and the
+# number of output samples follows each curve's length and total turning.
+
+STATUS = ('fourier', 'spline', 'too_short', 'failed')
+FOURIER, SPLINE, TOO_SHORT, FAILED = range(4)
+
+
+# Function to get the closed-loop steps of every segment: step i goes from point i
+# to the next point of its segment, the last point stepping back to the first
+def closed_steps(paths):
+    xy = paths.coords
+    nxt = np.arange(len(xy)) + 1
+    nxt[paths.seg_offsets[1:] - 1] = paths.seg_offsets[:-1]
+    return xy[nxt] - xy
+
+
+# Function to choose a sample count per segment from its closed length and total turning
+def sample_counts(paths, spacing=1.5, max_angle=np.radians(5), min_samples=16, max_samples=1000):
+    starts = paths.seg_offsets[:-1]
+    step = closed_steps(paths)
+    length = np.add.reduceat(np.hypot(step[:, 0], step[:, 1]), starts)
+    heading = np.arctan2(step[:, 1], step[:, 0])
+    prev = np.roll(heading, 1)
+    prev[starts] = heading[paths.seg_offsets[1:] - 1]
+    turn = np.abs(np.angle(np.exp(1j * (heading - prev))))
+    turn[np.hypot(step[:, 0], step[:, 1]) == 0] = 0
+    turning = np.add.reduceat(turn, starts)
+    n = np.maximum(np.ceil(length / spacing), np.ceil(turning / max_angle))
+    return np.clip(n, min_samples, max_samples).astype(int)
+
+
+# Function to get exp(2 pi i m t) for m = 0..M by repeated multiplication (one exp per point)
+def harmonic_powers(t, M):
+    powers = np.empty((len(t), M + 1), dtype=complex)
+    powers[:, 0] = 1
+    powers[:, 1:] = np.exp(2j * np.pi * t)[:, None]
+    return np.cumprod(powers, axis=1)
+
+
+# Function to build the Fourier design matrix [1, cos(2 pi k t), sin(2 pi k t)] for k = 1..K
+def fourier_basis(powers, K):
+    return np.concatenate((powers.real[:, :K + 1], powers.imag[:, 1:K + 1]), axis=1)
+
+
+# Function to fit and resample the given segments with periodic least-squares Fourier series.
+# Returns the resampled coordinates and the max fit residual of each segment.
+def fit_fourier(paths, steps, segs, samples, harmonics):
+    starts = paths.seg_offsets[segs]
+    counts = paths.seg_offsets[segs + 1] - starts
+    idx = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+    local = np.repeat(np.arange(len(segs)), counts)
+    sub_starts = np.cumsum(counts) - counts
+
+    xy = paths.coords[idx]
+    step = steps[idx]
+    dist = np.hypot(step[:, 0], step[:, 1])
+    perimeter = np.add.reduceat(dist, sub_starts)
+    t = (np.cumsum(dist) - dist - np.repeat(np.cumsum(perimeter) - perimeter, counts)) / perimeter[local]
+
+    # Segments with few points get fewer harmonics; unused columns are pinned to zero
+    C = 2 * harmonics + 1
+    K = np.minimum(harmonics, (counts - 1) // 2)
+    active = np.zeros((len(segs), C), dtype=bool)
+    active[:, 0] = True
+    k = np.arange(1, harmonics + 1)
+    active[:, 1:harmonics + 1] = active[:, harmonics + 1:] = k <= K[:, None]
+
+    # Products of the basis functions are themselves harmonics of order |k - l| and k + l,
+    # so the Gram matrices need only the per-segment sums of cos/sin(2 pi m t), m <= 2K
+    powers = harmonic_powers(t, 2 * harmonics)
+    sums = np.add.reduceat(powers, sub_starts)
+    sc, ss = sums.real, sums.imag
+    k = np.arange(harmonics + 1)
+    diff, plus = np.abs(k[:, None] - k), k[:, None] + k
+    sign = np.sign(k[:, None] - k)
+    cc = 0.5 * (sc[:, diff] + sc[:, plus])
+    sn = 0.5 * (sc[:, diff] - sc[:, plus])[:, 1:, 1:]
+    cs = 0.5 * (ss[:, plus] - sign * ss[:, diff])[:, :, 1:]
+    gram = np.concatenate((np.concatenate((cc, cs), axis=2),
+                           np.concatenate((cs.transpose(0, 2, 1), sn), axis=2)), axis=1)
+    gram = gram * (active[:, :, None] & active[:, None, :])
+    gram[:, np.arange(C), np.arange(C)] += ~active + 1e-9 * counts[:, None]
+
+    phi = fourier_basis(powers, harmonics) * active[local]
+    rhs = np.stack([np.add.reduceat(phi * xy[:, d, None], sub_starts) for d in (0, 1)], axis=2)
+    coef = np.linalg.solve(gram, rhs)
+
+    err = xy - np.einsum('ij,ijk->ik', phi, coef[local])
+    residual = np.maximum.reduceat(np.hypot(err[:, 0], err[:, 1]), sub_starts)
+
+    # Resample on a closed grid (the last sample repeats the first)
+    out_local = np.repeat(np.arange(len(segs)), samples)
+    out_starts = np.cumsum(samples) - samples
+    u = (np.arange(samples.sum()) - out_starts[out_local]) / (samples[out_local] - 1)
+    out = np.einsum('ij,ijk->ik', fourier_basis(harmonic_powers(u, harmonics), harmonics) * active[out_local], coef[out_local])
+    return np.split(out, np.cumsum(samples)[:-1]), residual
+
+
+# Function to complete every segment as a closed curve. Returns a dict with the
+# completed 'paths' (PolylineSet) and per-segment 'status' (index into STATUS),
+# 'samples' and fit 'residual' (relative to the segment's bounding-box diagonal).
+def complete_curves(paths_XYs, harmonics=12, max_residual=0.01, chunk_points=16384, **sampling):
+    paths = PolylineSet.from_paths(paths_XYs)
+    counts = np.diff(paths.seg_offsets)
+    status = np.full(paths.n_segments, FOURIER)
+    residual = np.zeros(paths.n_segments)
+    out = [paths.segment(k) for k in range(paths.n_segments)]
+    if paths.n_segments == 0:
+        return {'paths': paths, 'status': status, 'samples': counts, 'residual': residual}
+
+    samples = sample_counts(paths, **sampling)
+    lo, hi = paths.segment_bboxes()
+    scale = np.maximum(np.hypot(*(hi - lo).T), 1e-12)
+    steps = closed_steps(paths)
+    perimeter = np.add.reduceat(np.hypot(steps[:, 0], steps[:, 1]), paths.seg_offsets[:-1])
+    # Fewer than four points, or all points identical (no arc length to parametrise by)
+    status[(counts < 4) | ~(perimeter > 0)] = TOO_SHORT
+
+    # Batched Fourier fits, chunked so the per-point normal-equation terms stay small
+    todo = np.flatnonzero(status == FOURIER)
+    bounds = np.searchsorted(np.cumsum(counts[todo]), np.arange(chunk_points, counts[todo].sum(), chunk_points))
+    for chunk in np.split(todo, np.unique(bounds)):
+        if len(chunk) == 0:
+            continue
+        fitted, res = fit_fourier(paths, steps, chunk, samples[chunk], harmonics)
+        residual[chunk] = res / scale[chunk]
+        for k, XY in zip(chunk, fitted):
+            if np.isfinite(residual[k]) and np.all(np.isfinite(XY)):
+                out[k] = XY
+            else:
+                status[k] = FAILED  # the input is kept unchanged
+
+    # Corners and other features the series cannot follow: interpolating periodic spline
+    # (scipy.interpolate is only imported when some segment needs it)
+    for k in np.flatnonzero((status == FOURIER) & (residual > max_residual)):
+        from scipy.interpolate import splprep, splev
+
+        XY = paths.segment(k)
+        try:
+            tck, _ = splprep([XY[:, 0], XY[:, 1]], s=0, per=True)
+            XY = np.column_stack(splev(np.linspace(0, 1, samples[k]), tck))
+            if not np.all(np.isfinite(XY)):
+                raise ValueError("non-finite spline samples")
+            out[k] = XY
+            status[k] = SPLINE
+        except Exception:
+            out[k] = paths.segment(k)
+            status[k] = FAILED
+
+    kept = (status == TOO_SHORT) | (status == FAILED)
+    samples[kept] = counts[kept]
+    residual[status == SPLINE] = 0.0  # interpolating
+    n_segs = np.diff(paths.path_offsets)
+    completed = PolylineSet.from_paths([out[a:a + n] for a, n in zip(paths.path_offsets[:-1], n_segs)])
+    return {'paths': completed, 'status': status, 'samples': samples, 'residual': residual}
+
+
+# Function to count segments per completion status
+def status_counts(status):
+    return {name: int(np.count_nonzero(status == i)) for i, name in enumerate(STATUS)}
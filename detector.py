@@ -0,0 +1,118 @@
+import cv2
+import numpy as np
+from contour_features import classify_contours
+from stage_cache import image_digest
+
+# Reusable blur -> Canny -> Hough -> contour pipeline. Working buffers are
+# allocated once per frame size and reused through OpenCV's dst= arguments, and
+# stages whose outputs are not requested are skipped entirely. With a StageCache,
+# stage outputs are looked up by image content and the parameters feeding them,
+# so changing e.g. the Hough circle settings reuses the cached edge map.
+
+STAGES = ('edges', 'lines', 'circles', 'contours', 'shapes')
+
+DEFAULT_PARAMS = {
+    'blur_ksize': (5, 5),
+    'canny': (50, 150),
+    'hough_lines': {'rho': 1, 'theta': np.pi / 180, 'threshold': 100, 'minLineLength': 50, 'maxLineGap': 10},
+    'hough_circles': {'dp': 1.2, 'minDist': 50, 'param1': 50, 'param2': 30, 'minRadius': 10, 'maxRadius': 50},
+    'contour_approx': cv2.CHAIN_APPROX_SIMPLE,
+}
+
+
+class ShapeDetector:
+    def __init__(self, frame_shape=None, params=None, stages=('lines', 'circles', 'contours', 'shapes'), cache=None):
+        self.params = {**DEFAULT_PARAMS, **(params or {})}
+        self.stages = tuple(stages)
+        self.cache = cache
+        self.buffers = {}
+        if frame_shape is not None:
+            self._buffers(frame_shape[:2])
+
+    # Working buffers (gray, blurred, edges) for one frame size, allocated on first use
+    def _buffers(self, shape):
+        shape = tuple(shape)
+        if shape not in self.buffers:
+            self.buffers[shape] = tuple(np.empty(shape, dtype=np.uint8) for _ in range(3))
+        return self.buffers[shape]
+
+    # Function to run the requested stages on one image. The returned 'edges' array
+    # is the detector's own buffer and is overwritten by the next call.
+    def detect(self, image, stages=None):
+        stages = set(self.stages if stages is None else stages)
+        if 'shapes' in stages:
+            stages.add('contours')
+        gray_buf, blurred_buf, edges_buf = self._buffers(image.shape[:2])
+
+        if image.ndim == 3:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=gray_buf)
+        else:
+            gray = image
+
+        result = {}
+        if not stages & {'edges', 'lines', 'circles', 'contours'}:
+            return result
+
+        p = self.params
+        digest = image_digest(gray) if self.cache is not None else None
+        cached = {}
+        if digest is not None:
+            for stage in ('edges', 'lines', 'circles', 'contours'):
+                if stage in stages:
+                    value = self.cache.get(digest, stage, p)
+                    if value is not None:
+                        cached[stage] = value
+
+        # Canny only runs when a requested stage missed the cache
+        edges = None
+        if stages & {'edges', 'lines', 'circles', 'contours'} - set(cached):
+            edges = cached.get('edges')
+            if edges is None and digest is not None and 'edges' not in stages:
+                edges = self.cache.get(digest, 'edges', p)
+            if edges is None:
+                if p['blur_ksize']:
+                    gray = cv2.GaussianBlur(gray, p['blur_ksize'], 0, dst=blurred_buf)
+                edges = cv2.Canny(gray, *p['canny'], edges=edges_buf)
+                if digest is not None:
+                    self.cache.put(digest, 'edges', p, edges)
+        if 'edges' in stages:
+            result['edges'] = cached['edges'] if 'edges' in cached else edges
+
+        if 'lines' in stages:
+            if 'lines' in cached:
+                result['lines'] = cached['lines']
+            else:
+                lines = cv2.HoughLinesP(edges, **p['hough_lines'])
+                result['lines'] = np.empty((0, 4), dtype=np.int32) if lines is None else lines.reshape(-1, 4)
+
+        if 'circles' in stages:
+            if 'circles' in cached:
+                result['circles'] = cached['circles']
+            else:
+                circles = cv2.HoughCircles(edges, cv2.HOUGH_GRADIENT, **p['hough_circles'])
+                result['circles'] = np.empty((0, 3), dtype=np.float32) if circles is None else circles.reshape(-1, 3)
+
+        if 'contours' in stages:
+            if 'contours' in cached:
+                result['contours'] = cached['contours']
+            else:
+                result['contours'] = list(cv2.findContours(edges, cv2.RETR_EXTERNAL, p['contour_approx'])[0])
+
+        if digest is not None:
+            for stage in ('lines', 'circles', 'contours'):
+                if stage in stages and stage not in cached:
+                    self.cache.put(digest, stage, p, result[stage])
+
+        if 'shapes' in stages:
+            result['shapes'] = classify_contours(result['contours'])
+        return result
+
+    # Function to run detect over a sequence of frames, reusing the same buffers
+    def detect_many(self, images, stages=None):
+        results = []
+        for image in images:
+            result = self.detect(image, stages)
+            if 'edges' in result:
+                result['edges'] = result['edges'].copy()
+            results.append(result)
+        return results
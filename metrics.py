@@ -0,0 +1,136 @@
+import cProfile
+import io
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Minimal in-process metrics: counters and fixed-bucket histograms with labels,
+# rendered in the Prometheus text exposition format. Stage timings measured in
+# worker processes are returned as plain {stage: seconds} dicts and folded in
+# with observe_stages, so nothing here needs to be shared across processes.
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def label_text(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}'
+
+
+class Counter:
+    __slots__ = ('name', 'help', 'values', 'lock')
+
+    def __init__(self, name, help):
+        self.name, self.help = name, help
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self.lock:
+            lines += [f'{self.name}{label_text(k)} {v}' for k, v in sorted(self.values.items())]
+        return lines
+
+
+class Histogram:
+    __slots__ = ('name', 'help', 'buckets', 'values', 'lock')
+
+    def __init__(self, name, help, buckets=LATENCY_BUCKETS):
+        self.name, self.help = name, help
+        self.buckets = tuple(buckets)
+        self.values = {}  # labels -> [bucket counts..., sum, count]
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            row = self.values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t, **labels)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            for key, row in sorted(self.values.items()):
+                for bound, n in zip(self.buckets, row):
+                    lines.append(f'{self.name}_bucket{label_text(key + (("le", bound),))} {n}')
+                lines.append(f'{self.name}_bucket{label_text(key + (("le", "+Inf"),))} {row[-1]}')
+                lines.append(f'{self.name}_sum{label_text(key)} {row[-2]}')
+                lines.append(f'{self.name}_count{label_text(key)} {row[-1]}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def counter(self, name, help):
+        return self.metrics.setdefault(name, Counter(name, help))
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS):
+        return self.metrics.setdefault(name, Histogram(name, help, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics.values():
+            lines += metric.render()
+        return '\n'.join(lines) + '\n'
+
+
+# Function to time a block into a plain timings dict (usable inside worker processes)
+@contextmanager
+def stage_timer(timings, stage):
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - t
+
+
+# Function to add a {stage: seconds} dict to a stage histogram
+def observe_stages(histogram, timings, **labels):
+    for stage, seconds in timings.items():
+        histogram.observe(seconds, stage=stage, **labels)
+
+
+# Function to run fn under a profiler: mode 'cprofile' (top functions by cumulative
+# time) or 'tracemalloc' (peak and top allocating lines). Returns (result, report).
+def run_profiled(mode, fn, *args, limit=30):
+    out = io.StringIO()
+    if mode == 'cprofile':
+        profiler = cProfile.Profile()
+        result = profiler.runcall(fn, *args)
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(limit)
+    elif mode == 'tracemalloc':
+        tracemalloc.start()
+        try:
+            result = fn(*args)
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        out.write(f"current {current} bytes, peak {peak} bytes\n")
+        for stat in snapshot.statistics('lineno')[:limit]:
+            out.write(f"{stat}\n")
+    else:
+        raise ValueError(f"Unknown profile mode '{mode}', expected 'cprofile' or 'tracemalloc'.")
+    return result, out.getvalue()
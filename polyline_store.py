@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import numpy as np
+from polylines import PolylineSet, load_polylines
+
+# Binary companion store for polyline CSV files: the PolylineSet columns
+# (coords, seg_offsets, path_offsets) saved as plain .npy files and opened with
+# mmap, so opening is O(1) and only the pages of the paths actually used are
+# read. A store is built on the first load of a CSV and rebuilt when the source
+# changes: size + mtime are checked on every open, and a content hash settles it
+# when only the mtime moved (e.g. after a checkout). Stores live next to the CSV
+# as <name>.polylines/, or under POLYLINE_STORE_DIR; POLYLINE_STORE=0 disables them.
+
+COLUMNS = ('coords', 'seg_offsets', 'path_offsets')
+STAMP = 'source.json'
+SUFFIX = '.polylines'
+
+
+def store_enabled():
+    return os.environ.get('POLYLINE_STORE', '1') != '0'
+
+
+# Function to get the store directory for a CSV path
+def store_path(csv_path):
+    root = os.environ.get('POLYLINE_STORE_DIR')
+    if not root:
+        return os.fspath(csv_path) + SUFFIX
+    key = hashlib.sha256(os.path.abspath(csv_path).encode()).hexdigest()[:24]
+    return os.path.join(root, f"{key}-{os.path.basename(csv_path)}{SUFFIX}")
+
+
+# Function to hash a file in chunks
+def file_digest(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def read_stamp(store_dir):
+    try:
+        with open(os.path.join(store_dir, STAMP)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_stamp(store_dir, stamp):
+    tmp = os.path.join(store_dir, STAMP + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(stamp, f)
+    os.replace(tmp, os.path.join(store_dir, STAMP))
+
+
+# Function to save a PolylineSet as a store. The stamp goes last and is removed first,
+# so a half-written store is never taken as valid.
+def write_store(paths, store_dir, stamp):
+    os.makedirs(store_dir, exist_ok=True)
+    try:
+        os.remove(os.path.join(store_dir, STAMP))
+    except FileNotFoundError:
+        pass
+    for name in COLUMNS:
+        tmp = os.path.join(store_dir, name + '.tmp.npy')
+        np.save(tmp, np.ascontiguousarray(getattr(paths, name)))
+        os.replace(tmp, os.path.join(store_dir, name + '.npy'))
+    write_stamp(store_dir, stamp)
+
+
+def load_column(path):
+    try:
+        return np.load(path, mmap_mode='r')
+    except ValueError:
+        return np.load(path)  # empty arrays cannot be mapped
+
+
+# Function to open a store as a PolylineSet over read-only memory maps
+def open_store(store_dir):
+    return PolylineSet(*[load_column(os.path.join(store_dir, name + '.npy')) for name in COLUMNS])
+
+
+# Function to check a store against its source; returns the store's PolylineSet or None
+def open_if_current(csv_path, store_dir, st):
+    stamp = read_stamp(store_dir)
+    if stamp is None or stamp['size'] != st.st_size:
+        return None
+    if stamp['mtime_ns'] != st.st_mtime_ns:
+        if stamp['sha256'] != file_digest(csv_path):
+            return None
+        try:
+            write_stamp(store_dir, dict(stamp, mtime_ns=st.st_mtime_ns))
+        except OSError:
+            pass  # read-only store: still valid, the hash is checked again next time
+    try:
+        return open_store(store_dir)
+    except (OSError, ValueError):
+        return None
+
+
+# Function to load a polyline CSV through its store, building the store on a miss. If
+# the store cannot be written (read-only tree), the parsed data is returned as is.
+def load_stored(csv_path):
+    if not store_enabled():
+        return load_polylines(csv_path)
+    store_dir = store_path(csv_path)
+    st = os.stat(csv_path)
+    paths = open_if_current(csv_path, store_dir, st)
+    if paths is not None:
+        return paths
+
+    paths = load_polylines(csv_path)
+    stamp = {'source': os.path.abspath(csv_path), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns,
+             'sha256': file_digest(csv_path)}
+    try:
+        write_store(paths, store_dir, stamp)
+    except OSError:
+        pass
+    return paths
@@ -0,0 +1,207 @@
+import io
+import numpy as np
+
+# Polyline CSV files hold one point per row: path_id, segment_id, x, y
+
+
+# Raised by iter_polylines when a path's rows are interleaved with another path's;
+# such files can still be read whole with load_polylines
+class NotContiguous(ValueError):
+    pass
+
+
+# Read-only view of one path inside a PolylineSet; iterating yields XY arrays
+class PathView:
+    __slots__ = ('owner', 'index')
+
+    def __init__(self, owner, index):
+        self.owner = owner
+        self.index = index
+
+    def __len__(self):
+        p = self.owner.path_offsets
+        return int(p[self.index + 1] - p[self.index])
+
+    def __getitem__(self, j):
+        if isinstance(j, slice):
+            return [self[i] for i in range(*j.indices(len(self)))]
+        n = len(self)
+        if j < 0:
+            j += n
+        if not 0 <= j < n:
+            raise IndexError("segment index out of range")
+        return self.owner.segment(int(self.owner.path_offsets[self.index]) + j)
+
+    def __iter__(self):
+        p = self.owner.path_offsets
+        for k in range(p[self.index], p[self.index + 1]):
+            yield self.owner.segment(k)
+
+
+# Columnar polyline container: one (N, 2) coordinate buffer plus CSR offsets.
+# seg_offsets[k]:seg_offsets[k + 1] are the rows of segment k and
+# path_offsets[i]:path_offsets[i + 1] are the segments of path i.
+class PolylineSet:
+    __slots__ = ('coords', 'seg_offsets', 'path_offsets')
+
+    def __init__(self, coords, seg_offsets, path_offsets):
+        self.coords = coords
+        self.seg_offsets = seg_offsets
+        self.path_offsets = path_offsets
+
+    @classmethod
+    def from_rows(cls, rows):
+        rows = np.asarray(rows, dtype=float).reshape(-1, 4)
+        if len(rows) == 0:
+            return cls(np.empty((0, 2)), np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64))
+
+        # One stable sort keeps the point order inside every segment
+        order = np.lexsort((rows[:, 1], rows[:, 0]))
+        keys = rows[order, :2]
+        coords = np.ascontiguousarray(rows[order, 2:])
+
+        seg_starts = np.flatnonzero((keys[1:] != keys[:-1]).any(axis=1)) + 1
+        seg_paths = keys[np.concatenate(([0], seg_starts)), 0]
+        path_starts = np.flatnonzero(seg_paths[1:] != seg_paths[:-1]) + 1
+
+        seg_offsets = np.concatenate(([0], seg_starts, [len(coords)])).astype(np.int64)
+        path_offsets = np.concatenate(([0], path_starts, [len(seg_paths)])).astype(np.int64)
+        return cls(coords, seg_offsets, path_offsets)
+
+    @classmethod
+    def from_paths(cls, paths_XYs):
+        if isinstance(paths_XYs, cls):
+            return paths_XYs
+        segments = [np.asarray(XY, dtype=float).reshape(-1, 2) for path in paths_XYs for XY in path]
+        seg_counts = [len(XY) for XY in segments]
+        path_counts = [len(path) for path in paths_XYs]
+        coords = np.concatenate(segments) if segments else np.empty((0, 2))
+        seg_offsets = np.concatenate(([0], np.cumsum(seg_counts))).astype(np.int64)
+        path_offsets = np.concatenate(([0], np.cumsum(path_counts))).astype(np.int64)
+        return cls(coords, seg_offsets, path_offsets)
+
+    def to_lists(self):
+        return [list(path) for path in self]
+
+    @property
+    def n_paths(self):
+        return len(self.path_offsets) - 1
+
+    @property
+    def n_segments(self):
+        return len(self.seg_offsets) - 1
+
+    @property
+    def n_points(self):
+        return len(self.coords)
+
+    def __len__(self):
+        return self.n_paths
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(self.n_paths))]
+        if i < 0:
+            i += self.n_paths
+        if not 0 <= i < self.n_paths:
+            raise IndexError("path index out of range")
+        return PathView(self, i)
+
+    def __iter__(self):
+        for i in range(self.n_paths):
+            yield PathView(self, i)
+
+    def segment(self, k):
+        return self.coords[self.seg_offsets[k]:self.seg_offsets[k + 1]]
+
+    def segments(self):
+        return np.split(self.coords, self.seg_offsets[1:-1])
+
+    # Path index of every segment, and segment index of every point
+    def segment_path_index(self):
+        return np.repeat(np.arange(self.n_paths), np.diff(self.path_offsets))
+
+    def point_segment_index(self):
+        return np.repeat(np.arange(self.n_segments), np.diff(self.seg_offsets))
+
+    def bbox(self):
+        return self.coords.min(axis=0), self.coords.max(axis=0)
+
+    # Per-segment (min_xy, max_xy) bounding boxes
+    def segment_bboxes(self):
+        starts = self.seg_offsets[:-1]
+        return np.minimum.reduceat(self.coords, starts), np.maximum.reduceat(self.coords, starts)
+
+    def path_bboxes(self):
+        lo, hi = self.segment_bboxes()
+        starts = self.path_offsets[:-1]
+        return np.minimum.reduceat(lo, starts), np.maximum.reduceat(hi, starts)
+
+    def segment_lengths(self):
+        steps = np.zeros(self.n_points)
+        steps[1:] = np.linalg.norm(np.diff(self.coords, axis=0), axis=1)
+        steps[self.seg_offsets[:-1]] = 0  # no step across segment boundaries
+        return np.add.reduceat(steps, self.seg_offsets[:-1])
+
+    def path_lengths(self):
+        return np.add.reduceat(self.segment_lengths(), self.path_offsets[:-1])
+
+    def segment_centroids(self):
+        counts = np.diff(self.seg_offsets)[:, None]
+        return np.add.reduceat(self.coords, self.seg_offsets[:-1]) / counts
+
+    def path_centroids(self):
+        counts = np.diff(self.seg_offsets)
+        sums = np.add.reduceat(self.coords, self.seg_offsets[:-1])
+        path_sums = np.add.reduceat(sums, self.path_offsets[:-1])
+        path_counts = np.add.reduceat(counts, self.path_offsets[:-1])
+        return path_sums / path_counts[:, None]
+
+
+# Function to group raw CSV rows into a PolylineSet
+def group_polylines(rows):
+    return PolylineSet.from_rows(rows)
+
+
+# Function to read a whole polyline CSV (path, file handle or bytes)
+def load_polylines(source):
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    rows = np.loadtxt(source, delimiter=',', ndmin=2)
+    return group_polylines(rows)
+
+
+# Function to write a PolylineSet back to polyline CSV bytes (path, segment, x, y)
+def dump_polylines(paths_XYs, precision=6):
+    paths = PolylineSet.from_paths(paths_XYs)
+    seg = paths.point_segment_index()
+    path = paths.segment_path_index()[seg]
+    rows = np.column_stack((path, seg - paths.path_offsets[path], paths.coords))
+    buf = io.BytesIO()
+    np.savetxt(buf, rows, delimiter=',', fmt=['%d', '%d', f'%.{precision}f', f'%.{precision}f'])
+    return buf.getvalue()
+
+
+# Function to yield paths one at a time from an open CSV file handle.
+# Rows of a path must be contiguous in the file; paths come out in file order.
+def iter_polylines(csv_file):
+    current, lines, seen = None, [], set()
+
+    for line in csv_file:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line:
+            continue
+        path_id = float(line.split(',', 1)[0])
+        if path_id != current:
+            if lines:
+                yield group_polylines(np.loadtxt(lines, delimiter=',', ndmin=2))[0]
+            if path_id in seen:
+                raise NotContiguous(f"Rows of path {path_id:g} are not contiguous in the CSV file.")
+            seen.add(path_id)
+            current, lines = path_id, []
+        lines.append(line)
+
+    if lines:
+        yield group_polylines(np.loadtxt(lines, delimiter=',', ndmin=2))[0]
@@ -0,0 +1,102 @@
+import io
+import os
+import cv2
+import numpy as np
+from polylines import PolylineSet
+
+# Direct polyline rasterizer: draws a PolylineSet onto a preallocated canvas with
+# OpenCV instead of writing SVG text and parsing it back. Sizing follows the SVG
+# writers (bbox + 10% padding, upscaled by fact = max(1, 1024 // min(H, W))), and
+# coordinates keep SHIFT fractional bits so anti-aliased edges stay sub-pixel.
+# A tiny file can describe a huge canvas, so the canvas is bounded: the upscaling
+# factor is reduced to fit MAX_PIXELS, and drawings that do not fit even at
+# fact = 1 are refused with CanvasTooLarge.
+
+SHIFT = 4
+MAX_PIXELS = int(os.environ.get('RASTER_MAX_PIXELS', 1 << 25))  # 32M pixels, 96 MB as BGR
+INT32_MAX = np.iinfo(np.int32).max
+
+
+class CanvasTooLarge(ValueError):
+    pass
+
+
+NAMED_COLOURS = {
+    'blue': (0, 0, 255), 'green': (0, 128, 0), 'red': (255, 0, 0), 'cyan': (0, 255, 255),
+    'magenta': (255, 0, 255), 'yellow': (255, 255, 0), 'black': (0, 0, 0), 'white': (255, 255, 255),
+}
+
+
+# Function to turn an SVG colour ('#rrggbb' or a basic name) into a BGR tuple
+def to_bgr(colour):
+    if colour.startswith('#'):
+        r, g, b = (int(colour[i:i + 2], 16) for i in (1, 3, 5))
+    else:
+        r, g, b = NAMED_COLOURS[colour]
+    return b, g, r
+
+
+# Function to get the canvas size (W, H) in user units and the upscaling factor,
+# keeping (H * fact) * (W * fact) within max_pixels
+def canvas_size(paths, padding=0.1, max_pixels=MAX_PIXELS):
+    if paths.n_points and not np.all(np.isfinite(paths.coords)):
+        raise ValueError("Polyline coordinates must be finite.")
+    W, H = np.maximum(paths.bbox()[1], 0) if paths.n_points else (0, 0)
+    W, H = int(W + padding * W), int(H + padding * H)
+    base = max(W, 1) * max(H, 1)
+    if base > max_pixels:
+        raise CanvasTooLarge(f"A {W}x{H} canvas is over the {max_pixels} pixel limit.")
+    fact = max(1, 1024 // max(min(H, W), 1))
+    fact = max(1, min(fact, int(np.sqrt(max_pixels / base))))
+    return W, H, fact
+
+
+# Function to draw every path onto a white BGR canvas. fill=True fills each segment
+# (or each path's segments together with join_segments), like the SVG writers;
+# fill=False strokes the outlines instead.
+def rasterize(paths_XYs, colours, padding=0.1, fill=True, stroke_width=2, join_segments=False,
+              max_pixels=MAX_PIXELS):
+    paths = PolylineSet.from_paths(paths_XYs)
+    W, H, fact = canvas_size(paths, padding, max_pixels)
+    canvas = np.full((max(H, 1) * fact, max(W, 1) * fact, 3), 255, dtype=np.uint8)
+    if paths.n_points == 0:
+        return canvas
+
+    pts = np.rint(paths.coords * (fact * (1 << SHIFT)))
+    if np.abs(pts).max() > INT32_MAX:
+        raise CanvasTooLarge("Polyline coordinates are too far from the origin to rasterize.")
+    pts = pts.astype(np.int32)
+    segs = np.split(pts, paths.seg_offsets[1:-1])
+    thickness = max(1, int(round(stroke_width * fact)))
+    for i in range(paths.n_paths):
+        colour = to_bgr(colours[i % len(colours)])
+        own = segs[paths.path_offsets[i]:paths.path_offsets[i + 1]]
+        if not fill:
+            cv2.polylines(canvas, own, False, colour, thickness, cv2.LINE_AA, SHIFT)
+        elif join_segments:
+            cv2.fillPoly(canvas, own, colour, cv2.LINE_AA, SHIFT)
+        else:
+            for seg in own:
+                cv2.fillPoly(canvas, [seg], colour, cv2.LINE_AA, SHIFT)
+    return canvas
+
+
+# Function to rasterize straight to PNG bytes
+def render_png(paths_XYs, colours, **kwargs):
+    ok, png = cv2.imencode('.png', rasterize(paths_XYs, colours, **kwargs))
+    if not ok:
+        raise ValueError("PNG encoding failed.")
+    return png.tobytes()
+
+
+# Function to rasterize an SVG (path or binary file object) with svglib/reportlab, for
+# inputs that only exist as SVG; lxml parses it incrementally
+def svg_to_png(svg_file):
+    from svglib.svglib import svg2rlg
+    from reportlab.graphics import renderPM
+
+    drawing = svg2rlg(svg_file)
+    buf = io.BytesIO()
+    renderPM.drawToFile(drawing, buf, fmt='PNG')
+    buf.seek(0)
+    return buf
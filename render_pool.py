@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Process pool for CPU-heavy rendering. In-flight work is bounded: once
+# max_pending jobs are queued or running, submit() raises PoolBusy right away so
+# the caller can answer 503 instead of piling up requests. Jobs can be waited on
+# with a timeout (run) or tracked by id for submit/poll/fetch clients (submit_job).
+#
+# If a worker process dies (out of memory, a crash in a native library), the
+# executor is marked broken: the jobs it was running fail with BrokenProcessPool,
+# and the next submit() replaces it with a fresh executor.
+#
+# Limit: the timeout only bounds how long a caller waits. ProcessPoolExecutor
+# cannot stop one running job, so a runaway job keeps its worker and its pending
+# slot until it returns; max_pending bounds how many such jobs can pile up, and
+# only restarting the pool (shutdown()) reclaims them.
+
+
+class PoolBusy(Exception):
+    pass
+
+
+class RenderPool:
+    def __init__(self, max_workers=None, max_pending=None, timeout=60.0, job_ttl=600.0):
+        self.max_workers = (os.cpu_count() or 1) if max_workers is None else max_workers
+        self.max_pending = max_pending if max_pending is not None else 2 * max(self.max_workers, 1)
+        self.timeout = timeout
+        self.job_ttl = job_ttl
+        self.slots = threading.BoundedSemaphore(self.max_pending)
+        self.lock = threading.Lock()
+        self.executor = None
+        self.jobs = {}
+
+    def _executor(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self.executor
+
+    # Drop an executor whose worker died, unless another thread already replaced it
+    def _discard(self, executor):
+        with self.lock:
+            if self.executor is executor:
+                self.executor = None
+        executor.shutdown(wait=False)
+
+    def _submit_to_pool(self, fn, *args):
+        executor = self._executor()
+        try:
+            return executor.submit(fn, *args)
+        except BrokenProcessPool:
+            self._discard(executor)
+            return self._executor().submit(fn, *args)
+
+    def submit(self, fn, *args):
+        if not self.slots.acquire(blocking=False):
+            raise PoolBusy(f"{self.max_pending} render jobs already pending")
+        try:
+            if self.max_workers == 0:
+                # Inline mode, useful for debugging: run in the calling thread
+                future = Future()
+                try:
+                    future.set_result(fn(*args))
+                except Exception as e:
+                    future.set_exception(e)
+            else:
+                future = self._submit_to_pool(fn, *args)
+        except Exception:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    # Submit and wait; raises PoolBusy or concurrent.futures.TimeoutError.
+    # A timed-out job keeps running, and keeps its slot, until the worker finishes it.
+    def run(self, fn, *args, timeout=None):
+        future = self.submit(fn, *args)
+        return future.result(timeout=self.timeout if timeout is None else timeout)
+
+    def submit_job(self, fn, *args, on_done=None, job_id=None):
+        future = self.submit(fn, *args)
+        if on_done is not None:
+            future.add_done_callback(on_done)
+        job_id = job_id or uuid.uuid4().hex
+        with self.lock:
+            self._prune()
+            self.jobs[job_id] = (time.time(), future)
+        return job_id
+
+    def job(self, job_id):
+        with self.lock:
+            entry = self.jobs.get(job_id)
+        return entry[1] if entry else None
+
+    def job_status(self, job_id):
+        future = self.job(job_id)
+        if future is None:
+            return None
+        if not future.done():
+            return 'running' if future.running() else 'queued'
+        return 'failed' if future.exception() is not None else 'done'
+
+    # Forget finished jobs older than job_ttl (caller holds the lock)
+    def _prune(self):
+        cutoff = time.time() - self.job_ttl
+        for job_id in [j for j, (t, f) in self.jobs.items() if t < cutoff and f.done()]:
+            del self.jobs[job_id]
+
+    def stats(self):
+        with self.lock:
+            jobs = list(self.jobs.values())
+        return {'max_workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'timeout': self.timeout,
+                'jobs': len(jobs),
+                'jobs_pending': sum(not f.done() for _, f in jobs)}
+
+    def shutdown(self, wait=True):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=wait)
+                self.executor = None
@@ -0,0 +1,162 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+# Content-addressed cache for rendered outputs. Keys are a SHA-256 of the upload
+# bytes plus the rendering options; values are the rendered file bytes. Lookups
+# go to a bounded in-memory LRU first, then to an optional on-disk tier. The disk
+# tier keeps an LRU index (key -> size) and a running byte total, built by one scan
+# at start-up; the directory is only rescanned when the total goes over the limit,
+# which also picks up files written by other processes sharing it.
+
+
+# Function to hash a seekable upload stream in chunks (the stream is rewound afterwards)
+def stream_key(stream, *options, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        h.update(chunk)
+    stream.seek(0)
+    h.update(repr(options).encode())
+    return h.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, max_items=256, max_bytes=64 << 20, disk_dir=None, max_disk_bytes=1 << 30):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.lock = threading.Lock()
+        self.memory = OrderedDict()
+        self.memory_bytes = 0
+        self.stats = {'hits': 0, 'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0,
+                      'evictions': 0, 'disk_evictions': 0}
+        self.disk_index = OrderedDict()  # key -> size, least recently used first
+        self.disk_bytes = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._scan_disk()
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key)
+
+    def __contains__(self, key):
+        with self.lock:
+            if key in self.memory:
+                return True
+        return bool(self.disk_dir) and os.path.exists(self._disk_path(key))
+
+    # Returns a fresh BytesIO over the cached bytes, or None
+    def get(self, key):
+        with self.lock:
+            data = self.memory.get(key)
+            if data is not None:
+                self.memory.move_to_end(key)
+                self.stats['hits'] += 1
+                self.stats['memory_hits'] += 1
+                return io.BytesIO(data)
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                os.utime(path)  # mtime doubles as the last-access time for eviction
+            except OSError:
+                data = None
+            if data is not None:
+                with self.lock:
+                    if key in self.disk_index:
+                        self.disk_index.move_to_end(key)
+                    self.stats['hits'] += 1
+                    self.stats['disk_hits'] += 1
+                    self._remember(key, data)
+                return io.BytesIO(data)
+
+        with self.lock:
+            self.stats['misses'] += 1
+        return None
+
+    def put(self, key, data):
+        if isinstance(data, io.BytesIO):
+            data = data.getvalue()
+        with self.lock:
+            self.stats['stores'] += 1
+            self._remember(key, data)
+        if self.disk_dir:
+            path = self._disk_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+            with self.lock:
+                self.disk_bytes += len(data) - self.disk_index.pop(key, 0)
+                self.disk_index[key] = len(data)
+                over = self.disk_bytes > self.max_disk_bytes
+            if over:
+                self._evict_disk()
+        return io.BytesIO(data)
+
+    def _remember(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        old = self.memory.pop(key, None)
+        if old is not None:
+            self.memory_bytes -= len(old)
+        self.memory[key] = data
+        self.memory_bytes += len(data)
+        while len(self.memory) > self.max_items or self.memory_bytes > self.max_bytes:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+            self.stats['evictions'] += 1
+
+    # Rebuild the disk index from the directory, oldest mtime first
+    def _scan_disk(self):
+        entries = []
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if name.endswith('.tmp'):
+                    continue
+                try:
+                    st = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, name, st.st_size))
+        with self.lock:
+            self.disk_index = OrderedDict((name, size) for _, name, size in sorted(entries))
+            self.disk_bytes = sum(self.disk_index.values())
+
+    # Drop the least recently used files until the directory is back under 90% of
+    # max_disk_bytes, so the rescan is paid once per batch of evictions, not per put
+    def _evict_disk(self):
+        self._scan_disk()
+        target = 0.9 * self.max_disk_bytes
+        while True:
+            with self.lock:
+                if self.disk_bytes <= target or not self.disk_index:
+                    break
+                key, size = self.disk_index.popitem(last=False)
+                self.disk_bytes -= size
+            try:
+                os.remove(self._disk_path(key))
+            except OSError:
+                continue
+            with self.lock:
+                self.stats['disk_evictions'] += 1
+
+    def snapshot(self):
+        with self.lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {**self.stats,
+                    'hit_rate': self.stats['hits'] / lookups if lookups else 0.0,
+                    'items': len(self.memory),
+                    'bytes': self.memory_bytes,
+                    'max_items': self.max_items,
+                    'max_bytes': self.max_bytes,
+                    'disk_dir': self.disk_dir,
+                    'disk_items': len(self.disk_index),
+                    'disk_bytes': self.disk_bytes}
@@ -0,0 +1,196 @@
+import numpy as np
+from scipy.spatial import cKDTree
+from polylines import PolylineSet
+
+# Spatial index over the segments of a PolylineSet, for relating segments to each
+# other before completion: a uniform grid over segment bounding boxes (CSR layout,
+# cell -> segment ids; segments spanning more than max_cells cells are kept in a
+# short list checked on every query instead) and a KD-tree over segment endpoints. Endpoint i of segment
+# k is 2*k (start) or 2*k + 1 (end). Candidate joins come from one KD-tree pair
+# query, so the cost is O(n log n + candidates) instead of all-pairs.
+
+FRAGMENT, OCCLUSION = range(2)
+
+
+class SegmentIndex:
+    __slots__ = ('paths', 'lo', 'hi', 'cell', 'origin', 'shape', 'cell_offsets', 'cell_segments',
+                 'large', 'endpoints', 'tangents', 'tree')
+
+    def __init__(self, paths_XYs, cell=None, tangent_points=5, max_cells=64):
+        self.paths = PolylineSet.from_paths(paths_XYs)
+        self.lo, self.hi = self.paths.segment_bboxes()
+        self._build_grid(cell, max_cells)
+        self._build_endpoints(tangent_points)
+
+    def _build_grid(self, cell, max_cells):
+        # Cell size defaults to the median segment extent, so a segment covers few cells,
+        # and never finer than 1/1024 of the drawing so the grid stays small
+        extent = np.max(self.hi - self.lo, axis=1)
+        self.origin = self.lo.min(axis=0)
+        size = float(np.max(self.hi.max(axis=0) - self.origin))
+        self.cell = float(cell or max(np.median(extent), size / 1024, 1e-9))
+        c0 = np.floor((self.lo - self.origin) / self.cell).astype(np.int64)
+        c1 = np.floor((self.hi - self.origin) / self.cell).astype(np.int64)
+        self.shape = tuple(c1.max(axis=0) + 1)
+        span = c1 - c0 + 1
+        nx, ny = span[:, 0], span[:, 1]
+        # Long strokes among small fragments would fill a whole row or diagonal of cells
+        # each; they stay out of the grid, so it holds at most max_cells entries per segment
+        large = nx * ny > max_cells
+        self.large = np.flatnonzero(large)
+        counts = np.where(large, 0, nx * ny)
+        seg = np.repeat(np.arange(len(counts)), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cx = c0[seg, 0] + local % nx[seg]
+        cy = c0[seg, 1] + local // nx[seg]
+        keys = cx * self.shape[1] + cy
+        order = np.argsort(keys, kind='stable')
+        self.cell_segments = seg[order]
+        self.cell_offsets = np.searchsorted(keys[order], np.arange(self.shape[0] * self.shape[1] + 1))
+
+    def _build_endpoints(self, tangent_points):
+        starts, ends = self.paths.seg_offsets[:-1], self.paths.seg_offsets[1:] - 1
+        step = np.minimum(tangent_points, ends - starts)
+        xy = self.paths.coords
+        self.endpoints = np.empty((2 * len(starts), 2))
+        self.endpoints[0::2], self.endpoints[1::2] = xy[starts], xy[ends]
+        # Outward tangents: from a point a few samples in, towards the endpoint
+        out = np.empty_like(self.endpoints)
+        out[0::2] = xy[starts] - xy[starts + step]
+        out[1::2] = xy[ends] - xy[ends - step]
+        norm = np.hypot(out[:, 0], out[:, 1])
+        self.tangents = np.divide(out, norm[:, None], out=np.zeros_like(out), where=norm[:, None] > 0)
+        self.tree = cKDTree(self.endpoints)
+
+    # Function to get the segments whose bounding boxes intersect the box [lo, hi]
+    def query_bbox(self, lo, hi):
+        c0 = np.clip(np.floor((np.asarray(lo) - self.origin) / self.cell).astype(np.int64), 0, np.array(self.shape) - 1)
+        c1 = np.clip(np.floor((np.asarray(hi) - self.origin) / self.cell).astype(np.int64), 0, np.array(self.shape) - 1)
+        cells = (np.arange(c0[0], c1[0] + 1)[:, None] * self.shape[1] + np.arange(c0[1], c1[1] + 1)).ravel()
+        found = np.unique(np.concatenate([self.cell_segments[self.cell_offsets[c]:self.cell_offsets[c + 1]]
+                                          for c in cells] + [self.large]))
+        hit = np.all(self.lo[found] <= hi, axis=1) & np.all(self.hi[found] >= lo, axis=1)
+        return found[hit]
+
+    # Function to find candidate endpoint joins. Returns (a, b, distance, kind, cost) arrays
+    # for endpoint pairs on different open segments: FRAGMENT when the ends are within
+    # join_gap (and point back at each other, unless within snap), OCCLUSION when a longer
+    # gap up to max_gap is bridged by two ends heading towards each other.
+    def candidate_joins(self, join_gap, max_gap=None, angle_tol=np.radians(30), snap=None):
+        max_gap = max(join_gap, max_gap or join_gap)
+        snap = join_gap / 4 if snap is None else snap
+        pairs = self.tree.query_pairs(max_gap, output_type='ndarray')
+        a, b = pairs[:, 0], pairs[:, 1]
+        # Closed segments (ends meeting, relative to their own length) are complete
+        # already and never take part in joins
+        end_gap = np.hypot(*(self.endpoints[0::2] - self.endpoints[1::2]).T)
+        closed = end_gap <= np.minimum(snap, 0.05 * self.paths.segment_lengths())
+        keep = (a // 2 != b // 2) & ~closed[a // 2] & ~closed[b // 2]
+        a, b = a[keep], b[keep]
+
+        gap = self.endpoints[b] - self.endpoints[a]
+        dist = np.hypot(gap[:, 0], gap[:, 1])
+        ta, tb = self.tangents[a], self.tangents[b]
+        facing = -np.einsum('ij,ij->i', ta, tb)  # 1 when the ends point at each other
+        with np.errstate(divide='ignore', invalid='ignore'):
+            u = gap / dist[:, None]
+        heading = np.minimum(np.einsum('ij,ij->i', ta, u), -np.einsum('ij,ij->i', tb, u))
+        cos_tol = np.cos(angle_tol)
+
+        fragment = (dist <= join_gap) & ((dist <= snap) | (facing >= cos_tol))
+        occlusion = ~fragment & (dist > join_gap) & (facing >= cos_tol) & (heading >= cos_tol)
+        ok = fragment | occlusion
+        kind = np.where(fragment, FRAGMENT, OCCLUSION)[ok]
+        cost = (dist / max_gap + (1 - facing) / 2)[ok]
+        return a[ok], b[ok], dist[ok], kind, cost
+
+    # Function to list the segments (other than the two being joined) whose boxes overlap a gap
+    def occluders(self, a, b):
+        p, q = self.endpoints[a], self.endpoints[b]
+        found = self.query_bbox(np.minimum(p, q), np.maximum(p, q))
+        return found[(found != a // 2) & (found != b // 2)]
+
+
+# Function to pick joins greedily by cost: each endpoint is used once and no join
+# closes a loop (closing is left to curve completion)
+def select_joins(index, a, b, cost):
+    n = index.paths.n_segments
+    parent = np.arange(n)
+
+    def root(k):
+        while parent[k] != k:
+            parent[k] = parent[parent[k]]
+            k = parent[k]
+        return k
+
+    used = np.zeros(2 * n, dtype=bool)
+    chosen = []
+    for i in np.argsort(cost, kind='stable'):
+        ea, eb = a[i], b[i]
+        if used[ea] or used[eb]:
+            continue
+        ra, rb = root(ea // 2), root(eb // 2)
+        if ra == rb:
+            continue
+        parent[ra] = rb
+        used[ea] = used[eb] = True
+        chosen.append(i)
+    return np.array(chosen, dtype=int)
+
+
+# Function to walk the joins into chains of (segment, reversed) pieces
+def build_chains(n_segments, a, b):
+    link = np.full(2 * n_segments, -1)
+    link[a], link[b] = b, a
+    seen = np.zeros(n_segments, dtype=bool)
+    chains = []
+    # Every chain is open (joins never close loops), so start from free endpoints in segment order
+    for k in range(n_segments):
+        if seen[k]:
+            continue
+        if link[2 * k] >= 0 and link[2 * k + 1] >= 0:
+            continue  # interior piece, reached from a chain end
+        enter = 2 * k if link[2 * k] < 0 else 2 * k + 1
+        chain = []
+        while enter >= 0:
+            seg, side = divmod(int(enter), 2)
+            seen[seg] = True
+            chain.append((seg, side == 1))
+            partner = link[2 * seg + 1 - side]
+            enter = partner
+        chains.append(chain)
+    return chains
+
+
+# Function to join fragments and bridge occlusion gaps. Gaps are given as fractions of
+# the largest segment's bounding-box diagonal, so they follow the size of one shape and
+# do not grow with the number of shapes in the drawing. Returns a dict with the reassembled 'paths', the
+# 'chains' ([(segment, reversed)] per output segment) and the chosen 'joins'
+# (endpoint a, endpoint b, distance, kind, occluder count).
+def reassemble(paths_XYs, join_gap=0.03, max_gap=0.1, angle_tol=np.radians(30)):
+    paths = PolylineSet.from_paths(paths_XYs)
+    if paths.n_segments == 0:
+        return {'paths': paths, 'chains': [], 'joins': np.empty((0, 5))}
+    index = SegmentIndex(paths)
+    diag = float(np.max(np.hypot(*(index.hi - index.lo).T))) or 1.0
+    a, b, dist, kind, cost = index.candidate_joins(join_gap * diag, max_gap * diag, angle_tol)
+    chosen = select_joins(index, a, b, cost)
+    a, b, dist, kind = a[chosen], b[chosen], dist[chosen], kind[chosen]
+    n_occluders = np.array([len(index.occluders(i, j)) for i, j in zip(a[kind == OCCLUSION], b[kind == OCCLUSION])])
+    occluders = np.zeros(len(a))
+    occluders[kind == OCCLUSION] = n_occluders
+
+    chains = build_chains(paths.n_segments, a, b)
+    seg_path = paths.segment_path_index()
+    grouped = {}
+    for chain in chains:
+        pieces = []
+        for seg, rev in chain:
+            XY = paths.segment(seg)[::-1] if rev else paths.segment(seg)
+            if pieces and np.array_equal(pieces[-1][-1], XY[0]):
+                XY = XY[1:]  # coincident join point
+            pieces.append(XY)
+        grouped.setdefault(seg_path[chain[0][0]], []).append(np.concatenate(pieces))
+    joined = PolylineSet.from_paths([grouped[p] for p in sorted(grouped)])
+    joins = np.column_stack((a, b, dist, kind, occluders))
+    return {'paths': joined, 'chains': chains, 'joins': joins}
@@ -0,0 +1,93 @@
+import numpy as np
+from polylines import PolylineSet
+
+# Batched shape fitting: every statistic is a segmented reduction (ufunc.reduceat)
+# over the single coordinate buffer of a PolylineSet, so the cost is a handful of
+# NumPy calls no matter how many segments there are.
+
+LABELS = ('none', 'line', 'circle', 'rectangle')
+NONE, LINE, CIRCLE, RECTANGLE = range(4)
+
+
+# Function to fit lines, circles and rectangle edges to every segment at once
+def fit_segments(paths_XYs):
+    paths = PolylineSet.from_paths(paths_XYs)
+    starts = paths.seg_offsets[:-1]
+    counts = np.diff(paths.seg_offsets)
+    fits = {'counts': counts}
+    seg = paths.point_segment_index()
+    centroid = np.add.reduceat(paths.coords, starts) / counts[:, None]
+    uv = paths.coords - centroid[seg]
+    u, v = uv[:, 0], uv[:, 1]
+
+    # Total least squares line: principal axis of the centred scatter matrix
+    suu = np.add.reduceat(u * u, starts)
+    svv = np.add.reduceat(v * v, starts)
+    suv = np.add.reduceat(u * v, starts)
+    theta = 0.5 * np.arctan2(2 * suv, suu - svv)
+    direction = np.column_stack((np.cos(theta), np.sin(theta)))
+    dist = np.abs(u * -direction[seg, 1] + v * direction[seg, 0])
+    fits['line_point'] = centroid
+    fits['line_dir'] = direction
+    fits['line_residual'] = np.maximum.reduceat(dist, starts)
+    fits['line_residual'][counts < 2] = np.inf
+
+    # Algebraic (Kasa) circle fit on centred coordinates: u^2 + v^2 + D u + E v + F = 0.
+    # Any three points lie on a circle, so a fit needs at least four to mean anything
+    z = u * u + v * v
+    suz = np.add.reduceat(u * z, starts)
+    svz = np.add.reduceat(v * z, starts)
+    sz = np.add.reduceat(z, starts)
+    det = suu * svv - suv * suv
+    with np.errstate(divide='ignore', invalid='ignore'):
+        D = (-suz * svv + svz * suv) / det
+        E = (-svz * suu + suz * suv) / det
+        F = -sz / counts
+        a, b = -D / 2, -E / 2
+        radius = np.sqrt(a * a + b * b - F)
+    bad = (counts < 4) | ~np.isfinite(radius) | (np.abs(det) <= 1e-12 * (suu + svv) ** 2)
+    with np.errstate(invalid='ignore'):
+        radial = np.hypot(u - a[seg], v - b[seg]) - radius[seg]
+    fits['circle_center'] = centroid + np.column_stack((a, b))
+    fits['circle_radius'] = radius
+    fits['circle_residual'] = np.maximum.reduceat(np.abs(radial), starts)
+    fits['circle_residual'][bad] = np.inf
+
+    # Rectangle edge statistics for four-corner segments (optionally closed by a fifth point)
+    fits['rect_edge'] = np.full(paths.n_segments, np.inf)
+    fits['rect_angle'] = np.full(paths.n_segments, np.inf)
+    five = np.flatnonzero(counts == 5)
+    closed5 = np.zeros(paths.n_segments, dtype=bool)
+    closed5[five] = np.all(np.isclose(paths.coords[starts[five]], paths.coords[starts[five] + 4]), axis=1)
+    quads = np.flatnonzero((counts == 4) | closed5)
+    if len(quads):
+        corners = paths.coords[starts[quads, None] + np.arange(4)]
+        edges = np.roll(corners, -1, axis=1) - corners
+        lengths = np.linalg.norm(edges, axis=2)
+        prev = np.roll(edges, 1, axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cos = np.einsum('ijk,ijk->ij', edges, prev) / (lengths * np.roll(lengths, 1, axis=1))
+        fits['rect_edge'][quads] = np.maximum(np.abs(lengths[:, 0] - lengths[:, 2]),
+                                              np.abs(lengths[:, 1] - lengths[:, 3]))
+        fits['rect_angle'][quads] = np.nan_to_num(np.abs(cos).max(axis=1), nan=np.inf)
+    return fits
+
+
+# Function to test every fit against the tolerances; returns one boolean mask per shape
+def segment_tests(fits, line_tol=1e-2, circle_tol=1e-2, rect_tol=1e-2, rect_angle_tol=1e-2):
+    return {
+        'line': fits['line_residual'] <= line_tol,
+        'circle': fits['circle_residual'] <= circle_tol,
+        'rectangle': (fits['rect_edge'] <= rect_tol) & (fits['rect_angle'] <= rect_angle_tol),
+    }
+
+
+# Function to pick one label per segment. Rectangles win over circles because
+# the four corners of any rectangle lie on a circle.
+def label_segments(fits, **tolerances):
+    tests = segment_tests(fits, **tolerances)
+    labels = np.full(len(fits['counts']), NONE, dtype=np.int8)
+    labels[tests['circle']] = CIRCLE
+    labels[tests['rectangle']] = RECTANGLE
+    labels[tests['line']] = LINE
+    return labels
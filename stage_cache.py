@@ -0,0 +1,69 @@
+import hashlib
+import io
+import os
+import numpy as np
+from result_cache import ResultCache
+
+# Cache of intermediate detector results (edge maps, Hough lines and circles,
+# contours) keyed by the image content plus every parameter that feeds the
+# stage. Entries are stored as compressed .npz blobs in a ResultCache, which
+# gives a small in-memory LRU in front of an on-disk LRU bounded by size.
+
+# Parameters each stage depends on, including its upstream stages
+STAGE_PARAMS = {
+    'edges': ('blur_ksize', 'canny'),
+    'lines': ('blur_ksize', 'canny', 'hough_lines'),
+    'circles': ('blur_ksize', 'canny', 'hough_circles'),
+    'contours': ('blur_ksize', 'canny', 'contour_approx'),
+}
+
+
+# Function to hash image pixels together with their shape and dtype
+def image_digest(image):
+    image = np.ascontiguousarray(image)
+    h = hashlib.sha256(f"{image.shape}{image.dtype}".encode())
+    h.update(memoryview(image).cast('B'))
+    return h.hexdigest()
+
+
+class StageCache:
+    def __init__(self, cache_dir, max_bytes=1 << 30, memory_items=64):
+        self.store = ResultCache(max_items=memory_items, max_bytes=64 << 20,
+                                 disk_dir=cache_dir, max_disk_bytes=max_bytes)
+
+    def key(self, digest, stage, params):
+        used = tuple((name, params.get(name)) for name in STAGE_PARAMS[stage])
+        return hashlib.sha256(repr((digest, stage, used)).encode()).hexdigest()
+
+    # Returns the cached stage output (array, or list of arrays for contours) or None
+    def get(self, digest, stage, params):
+        buf = self.store.get(self.key(digest, stage, params))
+        if buf is None:
+            return None
+        with np.load(buf) as data:
+            if stage == 'contours':
+                offsets = data['offsets']
+                coords = data['coords']
+                return [coords[a:b].reshape(-1, 1, 2) for a, b in zip(offsets[:-1], offsets[1:])]
+            return data['value']
+
+    def put(self, digest, stage, params, value):
+        buf = io.BytesIO()
+        if stage == 'contours':
+            counts = [len(c) for c in value]
+            coords = np.concatenate([c.reshape(-1, 2) for c in value]) if value else np.empty((0, 2), np.int32)
+            np.savez_compressed(buf, coords=coords, offsets=np.concatenate(([0], np.cumsum(counts))))
+        else:
+            np.savez_compressed(buf, value=value)
+        self.store.put(self.key(digest, stage, params), buf.getvalue())
+
+    def stats(self):
+        return self.store.snapshot()
+
+
+# Function to build the cache configured by STAGE_CACHE_DIR / STAGE_CACHE_BYTES, or None when unset
+def cache_from_env():
+    cache_dir = os.environ.get('STAGE_CACHE_DIR')
+    if not cache_dir:
+        return None
+    return StageCache(cache_dir, int(os.environ.get('STAGE_CACHE_BYTES', 1 << 30)))
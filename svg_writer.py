@@ -0,0 +1,99 @@
+import io
+import numpy as np
+from polylines import PolylineSet
+
+# Writes polylines as SVG <path> elements straight from the coordinate buffer,
+# formatting a whole segment with one C-level string operation instead of a
+# Python loop per point.
+
+SVG_NS = ('xmlns="http://www.w3.org/2000/svg" '
+          'xmlns:ev="http://www.w3.org/2001/xml-events" '
+          'xmlns:xlink="http://www.w3.org/1999/xlink"')
+
+
+# Function to drop points closer than tol to the simplified line (Ramer-Douglas-Peucker)
+def simplify_polyline(XY, tol):
+    if tol <= 0 or len(XY) < 3:
+        return XY
+    keep = np.zeros(len(XY), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(XY) - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        chord = XY[b] - XY[a]
+        rel = XY[a + 1:b] - XY[a]
+        norm = np.hypot(chord[0], chord[1])
+        if norm == 0:
+            dist = np.hypot(rel[:, 0], rel[:, 1])
+        else:
+            dist = np.abs(chord[0] * rel[:, 1] - chord[1] * rel[:, 0]) / norm
+        i = int(np.argmax(dist))
+        if dist[i] > tol:
+            m = a + 1 + i
+            keep[m] = True
+            stack.append((a, m))
+            stack.append((m, b))
+    return XY[keep]
+
+
+# Function to build the "d" attribute of one segment
+def path_data(XY, precision=2, relative=False, simplify=0.0, close=None):
+    XY = simplify_polyline(np.asarray(XY, dtype=float), simplify)
+    if len(XY) == 0:
+        return ""
+    num = f"%.{precision}f"
+    XY = np.round(XY, precision) + 0.0  # + 0.0 turns -0.0 into 0.0
+    if relative:
+        # Differences of the rounded points, so rounding error never accumulates
+        steps = np.diff(XY, axis=0)
+        steps = np.round(steps, precision) + 0.0
+        d = f"M {num},{num}" % (XY[0, 0], XY[0, 1])
+        if len(steps):
+            d += (f" l{(' ' + num + ',' + num) * len(steps)}") % tuple(steps.ravel())
+    else:
+        d = f"M {num},{num}" % (XY[0, 0], XY[0, 1])
+        if len(XY) > 1:
+            d += (f" L{(' ' + num + ',' + num) * (len(XY) - 1)}") % tuple(XY[1:].ravel())
+    if close is None:
+        close = not np.allclose(XY[0], XY[-1])
+    if close:
+        d += " Z"
+    return d
+
+
+# Function to stream a whole PolylineSet (or nested lists) as an SVG document into out.
+# Each segment becomes its own <path> unless join_segments puts one <path> per path.
+def write_svg(paths_XYs, out, colours, width="100%", height="100%", precision=2,
+              relative=False, simplify=0.0, fill=True, stroke_width=2, join_segments=False,
+              **svg_attrs):
+    paths = PolylineSet.from_paths(paths_XYs)
+    attrs = {'baseProfile': 'tiny', 'height': height, **svg_attrs, 'version': '1.2', 'width': width}
+    header = ' '.join(f'{k.replace("_", "-")}="{v}"' for k, v in attrs.items())
+    out.write(f'<?xml version="1.0" encoding="utf-8" ?>\n<svg {header} {SVG_NS}><defs /><g>'.encode())
+
+    chunk = []
+    for i in range(paths.n_paths):
+        c = colours[i % len(colours)]
+        paint = f'fill="{c}" stroke="none"' if fill else f'fill="none" stroke="{c}"'
+        ds = [path_data(paths.segment(k), precision, relative, simplify)
+              for k in range(paths.path_offsets[i], paths.path_offsets[i + 1])]
+        if join_segments:
+            ds = [' '.join(ds)]
+        for d in ds:
+            chunk.append(f'<path d="{d}" {paint} stroke-width="{stroke_width}" />')
+        if len(chunk) >= 256:
+            out.write(''.join(chunk).encode())
+            chunk = []
+    chunk.append('</g></svg>')
+    out.write(''.join(chunk).encode())
+    return out
+
+
+# Function to render an SVG document into a rewound BytesIO
+def svg_bytes(paths_XYs, colours, **kwargs):
+    buf = io.BytesIO()
+    write_svg(paths_XYs, buf, colours, **kwargs)
+    buf.seek(0)
+    return buf
@@ -0,0 +1,137 @@
+import numpy as np
+from scipy.spatial import cKDTree
+from polylines import PolylineSet
+
+# Reflective symmetry search for point sets (image contours or polyline segments).
+# Points are mirrored across candidate axes through a centre and matched against
+# a KD-tree of the original points; the score of an axis is the fraction of
+# mirrored points that land within tol of some original point.
+
+
+# Function to get the axis angles (radians, in [0, pi)) of the principal axes
+def principal_angles(points):
+    points = np.asarray(points, dtype=float)
+    centred = points - points.mean(axis=0)
+    cov = centred.T @ centred
+    major = 0.5 * np.arctan2(2 * cov[0, 1], cov[0, 0] - cov[1, 1])
+    return np.mod([major, major + np.pi / 2], np.pi)
+
+
+# Function to mirror points across the lines through centre at the given angles.
+# Returns an array of shape (len(angles), len(points), 2).
+def reflect(points, centre, angles):
+    points = np.asarray(points, dtype=float)
+    angles = np.atleast_1d(np.asarray(angles, dtype=float))
+    c, s = np.cos(2 * angles), np.sin(2 * angles)
+    rel = points - centre
+    x = c[:, None] * rel[:, 0] + s[:, None] * rel[:, 1]
+    y = s[:, None] * rel[:, 0] - c[:, None] * rel[:, 1]
+    return np.stack((x, y), axis=-1) + centre
+
+
+# Function to score several axes at once; tree may be passed in to reuse it
+def symmetry_scores(points, centre, angles, tol=2.0, tree=None):
+    points = np.asarray(points, dtype=float)
+    if tree is None:
+        tree = cKDTree(points)
+    mirrored = reflect(points, centre, angles)
+    dist, _ = tree.query(mirrored.reshape(-1, 2), distance_upper_bound=tol)
+    hits = np.isfinite(dist).reshape(mirrored.shape[:2])
+    return hits.mean(axis=1)
+
+
+# Function to search arbitrary axis angles through centre (default: the centroid).
+# Candidates are the principal axes plus an even grid of n_angles; the best grid
+# angles are refined on a finer grid. Returns [(angle, score), ...], best first.
+def find_symmetry_axes(points, centre=None, tol=2.0, n_angles=36, min_score=0.9, refine=8):
+    points = np.asarray(points, dtype=float)
+    if len(points) < 3:
+        return []
+    if centre is None:
+        centre = points.mean(axis=0)
+    tree = cKDTree(points)
+    step = np.pi / n_angles
+
+    angles = np.concatenate((np.arange(n_angles) * step, principal_angles(points)))
+    scores = symmetry_scores(points, centre, angles, tol, tree)
+
+    # Refine around every candidate that is close to passing
+    seeds = angles[scores >= min_score * 0.8]
+    if len(seeds) and refine:
+        offsets = np.linspace(-step / 2, step / 2, 2 * refine + 1)
+        fine = np.mod((seeds[:, None] + offsets).ravel(), np.pi)
+        angles = np.concatenate((angles, fine))
+        scores = np.concatenate((scores, symmetry_scores(points, centre, fine, tol, tree)))
+
+    # Keep the best angle of each cluster of passing candidates
+    axes = []
+    for i in np.argsort(-scores, kind='stable'):
+        if scores[i] < min_score:
+            break
+        gap = [min(abs(angles[i] - a), np.pi - abs(angles[i] - a)) for a, _ in axes]
+        if all(g > step for g in gap):
+            axes.append((float(angles[i]), float(scores[i])))
+    return axes
+
+
+# Function to pair every point with the point nearest to its mirror image.
+# Returns the (k, 2, 2) array of pairs whose mirror lands within tol.
+def symmetry_pairs(points, centre, angle, tol=2.0):
+    points = np.asarray(points, dtype=float)
+    mirrored = reflect(points, centre, angle)[0]
+    dist, idx = cKDTree(points).query(mirrored, distance_upper_bound=tol)
+    hit = np.isfinite(dist)
+    return np.stack((points[hit], points[idx[hit]]), axis=1)
+
+
+# Function to find the best symmetry axis of every segment of a PolylineSet at once.
+# Each segment is centred on its centroid and scaled to unit RMS radius, then the
+# segments are laid out side by side so one KD-tree serves them all. For every
+# angle bin the mirrored points vote for their bin when they land on a point of
+# their own segment; the winning bin is the axis and its vote share the confidence.
+def segment_symmetry(paths_XYs, n_bins=36, rel_tol=0.05):
+    paths = PolylineSet.from_paths(paths_XYs)
+    n_seg = paths.n_segments
+    result = {
+        'centre': paths.segment_centroids() if n_seg else np.empty((0, 2)),
+        'angle': np.zeros(n_seg),
+        'confidence': np.zeros(n_seg),
+        'votes': np.zeros((n_seg, n_bins), dtype=np.int64),
+    }
+    if paths.n_points == 0:
+        return result
+
+    starts = paths.seg_offsets[:-1]
+    counts = np.diff(paths.seg_offsets)
+    seg = paths.point_segment_index()
+    rel = paths.coords - result['centre'][seg]
+    radius = np.sqrt(np.add.reduceat((rel ** 2).sum(axis=1), starts) / counts)
+    radius[radius == 0] = 1.0
+    unit = rel / radius[seg, None]
+
+    # Tolerance per segment: rel_tol of the radius, or the typical sample spacing if
+    # larger (capped, so scattered points cannot match everything)
+    steps = np.zeros(paths.n_points)
+    steps[1:] = np.hypot(*np.diff(unit, axis=0).T)
+    steps[starts] = 0
+    spacing = np.add.reduceat(steps, starts) / np.maximum(counts - 1, 1)
+    tol = np.clip(spacing, rel_tol, 3 * rel_tol)
+
+    # Lay segments out along x, far enough apart that they can never match each other
+    gap = 2 * (np.abs(unit).max() + tol.max()) + 1
+    shift = np.column_stack((seg * gap, np.zeros(paths.n_points)))
+    tree = cKDTree(unit + shift)
+
+    angles = np.arange(n_bins) * np.pi / n_bins
+    for b, angle in enumerate(angles):
+        mirrored = reflect(unit, (0.0, 0.0), angle)[0] + shift
+        dist, idx = tree.query(mirrored, distance_upper_bound=tol.max(), workers=-1)
+        hit = np.isfinite(dist)
+        hit[hit] &= (seg[idx[hit]] == seg[hit]) & (dist[hit] <= tol[seg[hit]])
+        result['votes'][:, b] = np.bincount(seg[hit], minlength=n_seg)
+
+    best = result['votes'].argmax(axis=1)
+    result['angle'] = angles[best]
+    result['confidence'] = result['votes'][np.arange(n_seg), best] / counts
+    result['confidence'][counts < 3] = 0.0
+    return result
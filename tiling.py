@@ -0,0 +1,275 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+from detector import ShapeDetector, DEFAULT_PARAMS
+
+# Tiled shape detection for very large grayscale scans. The image is cut into
+# overlapping tiles, each tile runs blur -> Canny -> HoughLinesP -> HoughCircles ->
+# findContours on its own, and the detections are merged back in image
+# coordinates. Only one tile's intermediates per worker are alive at a time, and
+# OpenCV releases the GIL, so a thread pool keeps every core busy.
+#
+# Seams: every tile owns the core of its area (the tile minus half the overlap on
+# inner sides). Circles, contours and line segments are kept only by the tile whose
+# core holds their centre (midpoint), so objects smaller than the overlap come out
+# exactly once. Contours cut by an inner tile edge are stitched afterwards from the
+# pieces the tiles saw (see stitch_contours); a contour can still differ from the
+# full-frame one where Canny hysteresis links its edges through weak pixels more than
+# half the overlap away. Lines crossing
+# a seam come out as overlapping pieces from both tiles, which are joined after
+# detection. HoughLinesP is probabilistic and its output depends on the frame it
+# sees, so tiled lines match the full-frame ones in coverage, not segment for segment.
+
+
+# Function to open a grayscale image; .npy files are memory-mapped so tiles read only their rows
+def load_gray(path):
+    if path.endswith('.npy'):
+        return np.load(path, mmap_mode='r')
+    return cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+
+
+# Function to yield (y0, y1, x0, x1) for overlapping tiles covering an image of the given shape
+def iter_tiles(shape, tile=2048, overlap=256):
+    H, W = shape[:2]
+    step = max(tile - overlap, 1)
+    for y0 in range(0, max(H - overlap, 1), step):
+        for x0 in range(0, max(W - overlap, 1), step):
+            yield y0, min(y0 + tile, H), x0, min(x0 + tile, W)
+
+
+# Function to get the core rectangle a tile owns (half the overlap trimmed on inner sides)
+def tile_core(bounds, shape, overlap):
+    y0, y1, x0, x1 = bounds
+    H, W = shape[:2]
+    half = overlap / 2
+    return (y0 + half if y0 > 0 else 0, y1 - half if y1 < H else H,
+            x0 + half if x0 > 0 else 0, x1 - half if x1 < W else W)
+
+
+# Function to run the detectors on one tile and return detections in image coordinates
+def detect_tile(image, bounds, overlap, detector, lines=True, circles=True, contours=True):
+    y0, y1, x0, x1 = bounds
+    tile = np.ascontiguousarray(image[y0:y1, x0:x1])
+    stages = [s for s, on in (('lines', lines), ('circles', circles), ('contours', contours)) if on]
+    found = detector.detect(tile, stages)
+    cy0, cy1, cx0, cx1 = tile_core(bounds, image.shape, overlap)
+
+    if lines:
+        segs = found['lines'] + np.array([x0, y0, x0, y0], dtype=found['lines'].dtype)
+        mx, my = (segs[:, 0] + segs[:, 2]) / 2, (segs[:, 1] + segs[:, 3]) / 2
+        found['lines'] = segs[(mx >= cx0) & (mx < cx1) & (my >= cy0) & (my < cy1)]
+
+    if circles:
+        circ = found['circles'] + np.array([x0, y0, 0], dtype=found['circles'].dtype)
+        own = (circ[:, 0] >= cx0) & (circ[:, 0] < cx1) & (circ[:, 1] >= cy0) & (circ[:, 1] < cy1)
+        found['circles'] = circ[own]
+
+    if contours:
+        kept, pieces = [], []
+        for contour in found['contours']:
+            bx, by, bw, bh = cv2.boundingRect(contour)
+            box = (x0 + bx, y0 + by, bw, bh)
+            contour = contour + np.array([x0, y0], dtype=contour.dtype)
+            cx, cy = box[0] + bw / 2, box[1] + bh / 2
+            cut = is_cut(box, bounds, image.shape)
+            if not cut and cx0 <= cx < cx1 and cy0 <= cy < cy1:
+                kept.append(contour)
+            elif cut or bw >= overlap / 2 or bh >= overlap / 2:
+                # Stitched after all tiles are done. Whole contours owned by another tile
+                # go along too: the owner may see only part of them.
+                pieces.append((contour, cut, bounds))
+        found['contours'] = kept
+        found['pieces'] = pieces
+    return found
+
+
+# Function to test whether a contour box (x, y, w, h in image coordinates) reaches an
+# inner edge of the tile, i.e. the tile only sees part of it
+def is_cut(box, bounds, shape):
+    x, y, w, h = box
+    y0, y1, x0, x1 = bounds
+    return (y0 > 0 and y <= y0) or (y1 < shape[0] and y + h >= y1) or \
+        (x0 > 0 and x <= x0) or (x1 < shape[1] and x + w >= x1)
+
+
+# Function to group boxes (x, y, w, h) into the bounding boxes of their overlapping
+# clusters; pieces of one contour seen by neighbouring tiles overlap in the seam strips
+def merge_boxes(boxes, margin=1):
+    boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+    lo, hi = boxes[:, :2], boxes[:, :2] + boxes[:, 2:]
+    while len(lo) > 1:
+        touch = np.all(lo[:, None] <= hi[None] + margin, axis=2) & np.all(hi[:, None] + margin >= lo[None], axis=2)
+        n, labels = connected_labels(touch)
+        if n == len(lo):
+            break
+        lo = np.array([lo[labels == k].min(axis=0) for k in range(n)])
+        hi = np.array([hi[labels == k].max(axis=0) for k in range(n)])
+    return np.column_stack((lo, hi - lo))
+
+
+# Function to label the connected components of a boolean adjacency matrix
+def connected_labels(adjacent):
+    labels = np.full(len(adjacent), -1)
+    n = 0
+    for start in range(len(adjacent)):
+        if labels[start] >= 0:
+            continue
+        frontier = [start]
+        labels[start] = n
+        while frontier:
+            nxt = np.flatnonzero(adjacent[frontier].any(axis=0) & (labels < 0))
+            labels[nxt] = n
+            frontier = list(nxt)
+        n += 1
+    return n, labels
+
+
+# Function to find the contours that cross tile seams. Contours are traced from the
+# connected edge pixels, and the outer border of a set of pixels does not change when
+# its holes are filled, so every cluster of pieces is redrawn filled on a small canvas
+# and traced once. This reuses the tiles' edge maps instead of re-running Canny on a
+# crop, whose hysteresis would see less context than the tiles did. Contours whose
+# owning tile saw them whole were kept there and are skipped. Memory is bounded by
+# the largest seam-crossing object, not the image.
+def stitch_contours(pieces, tiles, overlap, shape):
+    if not pieces:
+        return []
+    cores = [tile_core(bounds, shape, overlap) for bounds in tiles]
+    boxes = np.array([cv2.boundingRect(contour) for contour, _, _ in pieces], dtype=np.int64)
+    stitched = []
+    for x, y, w, h in merge_boxes(boxes):
+        inside = np.flatnonzero((boxes[:, 0] >= x) & (boxes[:, 1] >= y) &
+                                (boxes[:, 0] + boxes[:, 2] <= x + w) & (boxes[:, 1] + boxes[:, 3] <= y + h))
+        if not any(pieces[i][1] for i in inside):
+            continue
+        # Every pixel is taken from the tile whose core holds it, as for the other detections
+        canvas = np.zeros((h + 1, w + 1), dtype=np.uint8)
+        for bounds in dict.fromkeys(pieces[i][2] for i in inside):
+            layer = np.zeros_like(canvas)
+            cluster = [pieces[i][0] for i in inside if pieces[i][2] == bounds]
+            cv2.drawContours(layer, cluster, -1, 255, thickness=cv2.FILLED, offset=(-int(x), -int(y)))
+            cv2.drawContours(layer, cluster, -1, 255, thickness=1, offset=(-int(x), -int(y)))
+            cy0, cy1, cx0, cx1 = (int(np.ceil(v)) for v in tile_core(bounds, shape, overlap))
+            rows = slice(max(cy0 - y, 0), max(cy1 - y, 0))
+            cols = slice(max(cx0 - x, 0), max(cx1 - x, 0))
+            canvas[rows, cols] |= layer[rows, cols]
+        found, _ = cv2.findContours(canvas, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        for contour in found:
+            bx, by, bw, bh = cv2.boundingRect(contour)
+            box = (x + bx, y + by, bw, bh)
+            cx, cy = box[0] + bw / 2, box[1] + bh / 2
+            owner = next(i for i, (cy0, cy1, cx0, cx1) in enumerate(cores)
+                         if cx0 <= cx < cx1 and cy0 <= cy < cy1)
+            if is_cut(box, tiles[owner], shape):
+                stitched.append(contour + np.array([x, y], dtype=contour.dtype))
+    return stitched
+
+
+# Function to drop contours enclosed by another one. findContours(RETR_EXTERNAL) on the
+# full frame never reports them, but a tile or crop that sees only part of the outer
+# contour does. External contours never overlap, so a contour with any sampled point
+# strictly inside another (their boundaries may share pixels) is an enclosed one.
+def drop_enclosed(contours, samples=8):
+    if len(contours) < 2:
+        return contours
+    boxes = np.array([cv2.boundingRect(c) for c in contours], dtype=np.int64)
+    lo, hi = boxes[:, :2], boxes[:, :2] + boxes[:, 2:]
+    contains = np.all(lo[:, None] <= lo[None], axis=2) & np.all(hi[:, None] >= hi[None], axis=2)
+    np.fill_diagonal(contains, False)
+    out = []
+    for j, contour in enumerate(contours):
+        points = contour[::max(1, len(contour) // samples), 0]
+        enclosed = any(cv2.pointPolygonTest(contours[i], (float(px), float(py)), False) > 0
+                       for i in np.flatnonzero(contains[:, j]) for px, py in points)
+        if not enclosed:
+            out.append(contour)
+    return out
+
+
+# Function to join collinear line segments that overlap or touch (pieces split by tile seams)
+def merge_lines(segs, angle_tol=np.radians(2), dist_tol=3.0, gap_tol=10.0):
+    segs = np.asarray(segs, dtype=float).reshape(-1, 4)
+    if len(segs) < 2:
+        return np.rint(segs).astype(np.int32)
+    d = segs[:, 2:] - segs[:, :2]
+    theta = np.mod(np.arctan2(d[:, 1], d[:, 0]), np.pi)
+    direction = np.column_stack((np.cos(theta), np.sin(theta)))
+    normal = np.column_stack((-direction[:, 1], direction[:, 0]))
+
+    merged = []
+    used = np.zeros(len(segs), dtype=bool)
+    for i in np.argsort(theta):
+        if used[i]:
+            continue
+        # Candidates: similar angle (wrapping at pi) and both endpoints close to line i.
+        # The distance is measured from segment i itself, not as an offset from the image
+        # origin, which would swing by |p| * dtheta far from the origin.
+        dtheta = np.abs(theta - theta[i])
+        dtheta = np.minimum(dtheta, np.pi - dtheta)
+        off = np.maximum(np.abs((segs[:, :2] - segs[i, :2]) @ normal[i]),
+                         np.abs((segs[:, 2:] - segs[i, :2]) @ normal[i]))
+        group = np.flatnonzero(~used & (dtheta <= angle_tol) & (off <= dist_tol))
+
+        # Project the candidates on the direction of segment i and merge overlapping intervals
+        t = np.column_stack((segs[group, :2] @ direction[i], segs[group, 2:] @ direction[i]))
+        lo, hi = t.min(axis=1), t.max(axis=1)
+        order = np.argsort(lo)
+        clusters, current, end = [], [order[0]], hi[order[0]]
+        for k in order[1:]:
+            if lo[k] <= end + gap_tol:
+                current.append(k)
+                end = max(end, hi[k])
+            else:
+                clusters.append(current)
+                current, end = [k], hi[k]
+        clusters.append(current)
+
+        base = normal[i] * (segs[i, :2] @ normal[i])
+        for cluster in clusters:
+            used[group[cluster]] = True
+            start, end = lo[cluster].min(), hi[cluster].max()
+            merged.append(np.concatenate((base + start * direction[i], base + end * direction[i])))
+    return np.rint(merged).astype(np.int32).reshape(-1, 4)
+
+
+# Function to drop circles whose centres are within min_dist of a stronger (earlier) one
+def merge_circles(circles, min_dist=5.0):
+    circles = np.asarray(circles, dtype=np.float32).reshape(-1, 3)
+    keep = []
+    for c in circles:
+        if all(np.hypot(*(c[:2] - k[:2])) > min_dist for k in keep):
+            keep.append(c)
+    return np.array(keep, dtype=np.float32).reshape(-1, 3)
+
+
+# Function to detect lines, circles and contours on an image of any size tile by tile.
+# Returns the same dict layout as ShapeDetector.detect: lines (N, 4), circles (N, 3)
+# and a list of contours.
+def detect_tiled(image, tile=2048, overlap=256, workers=None, params=DEFAULT_PARAMS,
+                 lines=True, circles=True, contours=True):
+    if isinstance(image, str):
+        image = load_gray(image)
+    tiles = list(iter_tiles(image.shape, tile, overlap))
+    local = threading.local()  # one detector (and buffer set) per worker thread
+
+    def run(bounds):
+        if not hasattr(local, 'detector'):
+            local.detector = ShapeDetector((tile, tile), params)
+        return detect_tile(image, bounds, overlap, local.detector, lines, circles, contours)
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        results = list(pool.map(run, tiles))
+
+    found = {}
+    if lines:
+        found['lines'] = merge_lines(np.concatenate([r['lines'] for r in results]))
+    if circles:
+        found['circles'] = merge_circles(np.concatenate([r['circles'] for r in results]))
+    if contours:
+        kept = [c for r in results for c in r['contours']]
+        stitched = stitch_contours([p for r in results for p in r['pieces']], tiles, overlap, image.shape)
+        found['contours'] = drop_enclosed(kept + stitched)
+    return found
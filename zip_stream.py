@@ -0,0 +1,50 @@
+import io
+import zipfile
+
+# Write-only sink for zipfile.ZipFile that hands back the bytes written so far, so
+# an archive can be sent while it is still being built. zipfile falls back to data
+# descriptors on unseekable outputs, so no entry needs to be rewritten later.
+
+
+class ZipSink(io.RawIOBase):
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.chunks.append(bytes(b))
+        return len(b)
+
+    # Bytes written since the last drain
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+# Function to make an entry name relative and free of '..' components
+def safe_name(name):
+    parts = [p for p in name.replace('\\', '/').split('/') if p not in ('', '.', '..')]
+    return '/'.join(parts) or 'output'
+
+
+# Function to get a unique archive name for `name`, adding -2, -3, ... on collisions
+def unique_name(name, used):
+    name = safe_name(name)
+    stem, dot, ext = name.rpartition('.')
+    if not dot:
+        stem, ext = name, ''
+    candidate, n = name, 1
+    while candidate in used:
+        n += 1
+        candidate = f"{stem}-{n}{dot}{ext}"
+    used.add(candidate)
+    return candidate
+
+
+# Function to write one entry; already-compressed formats are stored as-is
+def write_entry(archive, name, data):
+    compress = zipfile.ZIP_STORED if name.endswith('.png') else zipfile.ZIP_DEFLATED
+    archive.writestr(zipfile.ZipInfo(name), data, compress_type=compress)